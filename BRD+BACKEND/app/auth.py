@@ -1,12 +1,14 @@
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
 from jose import JWTError
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from app import models, database
 from app.utils import jwt
+from app.services.passwords import pwd_context, password_hasher, PasswordHasherBusy
+from app.services.principals import Principal, principal_cache
+from app.services import membership
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")
 
 def get_db():
@@ -16,23 +18,76 @@ def get_db():
     finally:
         db.close()
 
-def hash_password(password: str):
-    return pwd_context.hash(password)
+async def get_async_db():
+    """Session for ``async def`` routes: an AsyncSession when DB_ASYNC_ENABLED,
+    else the sync session driven from a worker thread. Either way, sync
+    service code runs through ``await db.run_sync(fn, ...)``."""
+    if database.AsyncSessionLocal is not None:
+        async with database.AsyncSessionLocal() as db:
+            yield db
+        return
+    db = database.ThreadedSession(database.SessionLocal())
+    try:
+        yield db
+    finally:
+        await db.close()
+
+def password_hasher_busy(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": "1"},
+    )
+
+async def hash_password(password: str):
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise password_hasher_busy("Too many registrations, try again shortly")
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if not user or not verify_password(password, user.hashed_password):
+async def authenticate_user(db: Session, email: str, password: str):
+    user = await run_in_threadpool(lambda: db.query(models.User).filter(models.User.email == email).first())
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password if user else None)
+    except PasswordHasherBusy:
+        raise password_hasher_busy("Too many login attempts, try again shortly")
+    if not valid:
         return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await run_in_threadpool(db.commit)
     return user
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    user_id = jwt.verify_access_token(token)
+def load_principal(user_id: int):
+    with database.SessionLocal() as db:
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+        return Principal.from_user(user) if user else None
+
+def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    """Resolves the bearer token to a Principal without touching the database
+    when possible: from the principal cache, else from the token's claims
+    unless the user changed since it was issued, else from the users table."""
+    claims = jwt.decode_access_token(token)
+    user_id = claims.get("user_id") if claims else None
     if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    if not principal_cache.changed_since(user_id, claims.get("iat")):
+        principal = Principal.from_claims(claims)
+    if principal is None:
+        principal = load_principal(user_id)
+    if principal is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    principal_cache.set(principal)
+    return principal
+
+def is_group_member(db: Session, group_id: int, user: Principal) -> bool:
+    return membership.is_group_member(db, user.id, group_id)
+
+def is_project_member(db: Session, project_id: int, user: Principal) -> bool:
+    return membership.is_project_member(db, user.id, project_id)
@@ -1,15 +1,146 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 import os
+import time
+import asyncio
+import functools
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Sync routes run on Starlette's 40-thread pool and the document job workers
+# hold a connection each, so size the pool for that rather than the 5+10
+# default. Overflow connections are closed again once returned.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Async routes use an asyncpg engine when enabled; otherwise they run the
+# sync session in a worker thread (see ThreadedSession).
+DB_ASYNC_ENABLED = os.getenv("DB_ASYNC_ENABLED", "false").lower() == "true"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+
+class PoolMetrics:
+    """Checkout counts and time spent waiting for a pooled connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+        stats.update({"size": pool.size(), "checked_out": pool.checkedout(), "overflow": pool.overflow()})
+        return stats
+
+
+class _MeteredPool:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return connection
+
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    metrics = PoolMetrics()
+
+
+class MeteredAsyncQueuePool(_MeteredPool, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+
+def pool_options(url: str, poolclass) -> dict:
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def async_database_url(url: str) -> str:
+    if ASYNC_DATABASE_URL:
+        return ASYNC_DATABASE_URL
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    raise ValueError("DB_ASYNC_ENABLED needs ASYNC_DATABASE_URL for non-PostgreSQL databases")
+
+
 # No need for connect_args for PostgreSQL
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL, MeteredQueuePool))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC_ENABLED:
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    async_url = async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(async_url, **pool_options(async_url, MeteredAsyncQueuePool))
+    # Objects stay usable after commit; expiring them would mean implicit
+    # IO on attribute access, which an AsyncSession can't do.
+    AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+class ThreadedSession:
+    """The subset of AsyncSession the routers use, over a sync Session whose
+    calls run in a worker thread so they don't block the event loop."""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await asyncio.to_thread(functools.partial(fn, self.session, *args, **kwargs))
+
+    async def commit(self):
+        await asyncio.to_thread(self.session.commit)
+
+    async def close(self):
+        await asyncio.to_thread(self.session.close)
+
+
+def pool_status() -> dict:
+    status = {"sync": MeteredQueuePool.metrics.snapshot(engine.pool) if isinstance(engine.pool, QueuePool) else {}}
+    if async_engine is not None and isinstance(async_engine.pool, QueuePool):
+        status["async"] = MeteredAsyncQueuePool.metrics.snapshot(async_engine.pool)
+    return status
+
+
 Base = declarative_base()
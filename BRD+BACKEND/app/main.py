@@ -1,12 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import users, groups, projects, documents, brd
-from app.database import Base, engine
+from app.database import pool_status
+from app.utils.pagination import NEXT_CURSOR_HEADER
 from fastapi.staticfiles import StaticFiles
+from app.services.document_jobs import document_jobs
+from app.services.llm_cache import llm_cache
+from app.services.llm_gateway import llm_gateway
 
 
-
-Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic: run `alembic upgrade head` from
+# BRD+BACKEND before starting the app.
 
 app = FastAPI()
 
@@ -17,8 +21,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],  # pagination cursor for list endpoints
 )
 
+@app.on_event("startup")
+def resume_document_jobs():
+    document_jobs.recover()
+
+@app.get("/api/metrics/db")
+def database_pool_metrics():
+    """Connection pool checkouts, timeouts and wait times."""
+    return pool_status()
+
+@app.get("/api/metrics/llm")
+def llm_metrics():
+    """LLM cache hits and misses, Groq call latencies and rate limiter queue."""
+    return {
+        "cache": llm_cache.stats() if llm_cache is not None else None,
+        "gateway": llm_gateway.metrics(),
+    }
+
 # Routers
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(groups.router, prefix="/api/groups", tags=["Groups"])
@@ -1,13 +1,16 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, LargeBinary
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, LargeBinary, UniqueConstraint, Index
+from sqlalchemy.orm import relationship, deferred
 from app.database import Base
-from sqlalchemy import Text
+from sqlalchemy import Text, DateTime
+import datetime
 
 
+# (user_id, group_id) primary key serves membership checks and "my groups";
+# the group_id index serves member listings.
 group_members = Table(
     'group_members', Base.metadata,
-    Column('user_id', Integer, ForeignKey('users.id')),
-    Column('group_id', Integer, ForeignKey('groups.id'))
+    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+    Column('group_id', Integer, ForeignKey('groups.id'), primary_key=True, index=True)
 )
 
 class User(Base):
@@ -22,33 +25,94 @@ class Group(Base):
     __tablename__ = "groups"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
-    created_by = Column(Integer, ForeignKey("users.id"))
+    created_by = Column(Integer, ForeignKey("users.id"), index=True)
     members = relationship("User", secondary=group_members, back_populates="groups")
 
 
 class Project(Base):
     __tablename__ = "projects"
+    # Serves both group_id lookups and keyset pages ordered by id.
+    __table_args__ = (Index("ix_projects_group_id_id", "group_id", "id"),)
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     description = Column(Text)
     group_id = Column(Integer, ForeignKey("groups.id"))
-    created_by = Column(Integer, ForeignKey("users.id"))
+    created_by = Column(Integer, ForeignKey("users.id"), index=True)
     group = relationship("Group")
     creator = relationship("User")
+    summary = relationship("ProjectSummary", uselist=False, back_populates="project", cascade="all, delete-orphan")
 
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (Index("ix_documents_project_id_id", "project_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String)
     path = Column(String)
     description = Column(String)
     summary_title = Column(String)
-    summary_description = Column(Text)
+    # Can run to hundreds of KB; loaded only on access or with
+    # .options(undefer(Document.summary_description)).
+    summary_description = deferred(Column(Text))
+    content_hash = Column(String(64), index=True)
 
     project_id = Column(Integer, ForeignKey("projects.id"))
-    uploaded_by = Column(Integer, ForeignKey("users.id"))
+    uploaded_by = Column(Integer, ForeignKey("users.id"), index=True)
 
     project = relationship("Project", backref="documents")
     uploader = relationship("User")
+
+
+class StoredBlob(Base):
+    """One stored file per distinct upload content, shared by its Documents."""
+    __tablename__ = "stored_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String)
+    size = Column(Integer)
+    ref_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class ChunkCheckpoint(Base):
+    """A finished chunk summary, so a retried document only redoes missing chunks."""
+    __tablename__ = "chunk_checkpoints"
+    __table_args__ = (UniqueConstraint("document_hash", "total_chunks", "chunk_index"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_hash = Column(String(64), index=True)
+    chunk_index = Column(Integer)
+    total_chunks = Column(Integer)
+    title = Column(String)
+    description = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class ProjectSummary(Base):
+    """Materialized concatenation of a project's document summaries."""
+    __tablename__ = "project_summaries"
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    combined_summary = Column(Text, default="")
+    document_count = Column(Integer, default=0)
+    version = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    project = relationship("Project", back_populates="summary")
+
+
+class DocumentJob(Base):
+    __tablename__ = "document_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), index=True)
+    content_type = Column(String)
+    status = Column(String, default="queued", index=True)  # queued, running, completed, failed
+    total_chunks = Column(Integer, default=0)
+    processed_chunks = Column(Integer, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    document = relationship("Document", backref="jobs")
@@ -1,59 +1,80 @@
 from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 import json
 import tempfile
-import os
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from app import models, auth
+from app.services.project_summary import get_project_summary
+from app.services.vector_index import project_retriever
 from app.v2_logic import (
     BRDInput,
     process_brd,
     generate_final_brd,
-    create_brd_word_document
+    stream_final_brd,
+    create_brd_word_document,
+    fit_summary_to_context,
+    presummarized_context,
+    BRD_GENERATION_MODE,
+    BRD_GENERATION_MODES
 )
 
+if TYPE_CHECKING:
+    # Annotation only: the asyncio extension needs greenlet, which is only
+    # required when DB_ASYNC_ENABLED is on.
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 router = APIRouter()
 
+def load_member_project(db: Session, project_id: int, user: auth.Principal) -> models.Project:
+    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not auth.is_group_member(db, project.group_id, user):
+        raise HTTPException(status_code=403, detail="Access denied")
+    return project
+
 @router.post("/generate-initial")
 async def generate_initial_brd(
     project_id: int = Form(...),
     prompt: str = Form(...),
     template: Optional[UploadFile] = File(None),
-    db: Session = Depends(auth.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    mode: str = Form(BRD_GENERATION_MODE),
+    db: "AsyncSession" = Depends(auth.get_async_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    if current_user not in project.group.members:
-        raise HTTPException(status_code=403, detail="Access denied")
+    if mode not in BRD_GENERATION_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(BRD_GENERATION_MODES)}")
+    project = await db.run_sync(load_member_project, project_id, current_user)
 
-    docs = db.query(models.Document).filter(models.Document.project_id == project_id).all()
-    combined_summary = "\n\n".join([
-        f"Document: {doc.summary_title or doc.filename}\n{doc.summary_description or ''}"
-        for doc in docs
-    ])
+    combined_summary, summary_version = await db.run_sync(get_project_summary, project_id)
+    combined_summary = await run_in_threadpool(fit_summary_to_context, combined_summary)
 
     template_bytes = await template.read() if template else b""
 
     # Store template and prompt for reuse in final
     project.prompt = prompt
     project.template_bytes = template_bytes
-    db.commit()
+    await db.commit()
 
+    retriever = await db.run_sync(project_retriever, project_id)
     brd_input = BRDInput(
-        prompt=f"{prompt}\n\nAnalyze the following summaries:\n{combined_summary}",
+        prompt=prompt,
         template=template_bytes,
-        support_documents=[]
+        support_documents=[],
+        presummarized=combined_summary,
+        retriever=retriever
     )
 
-    result = process_brd(brd_input)
+    result = await run_in_threadpool(process_brd, brd_input, mode)
 
     return {
         "reworded_summary": result["reworded_summary"],
         "completion_suggestions": result["completion_suggestions"],
-        "brd_draft": result["brd_draft"]
+        "brd_draft": result["brd_draft"],
+        "stage_timings": result["stage_timings"],
+        "summary_version": summary_version
     }
 @router.post("/generate-final")
 async def generate_brd_final(
@@ -61,60 +82,102 @@ async def generate_brd_final(
     prompt: str = Form(...),
     completion_answers: Optional[str] = Form("{}"),
     template: Optional[UploadFile] = File(None),  # Optional to allow reuse of previously uploaded
-    db: Session = Depends(auth.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    mode: str = Form(BRD_GENERATION_MODE),
+    db: "AsyncSession" = Depends(auth.get_async_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    if current_user not in project.group.members:
-        raise HTTPException(status_code=403, detail="Access denied")
+    if mode not in BRD_GENERATION_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(BRD_GENERATION_MODES)}")
+    await db.run_sync(load_member_project, project_id, current_user)
 
-    # Collect previously uploaded document summaries
-    docs = db.query(models.Document).filter(models.Document.project_id == project_id).all()
-    combined_summary = "\n\n".join([
-        f"Document: {doc.summary_title or doc.filename}\n{doc.summary_description or ''}"
-        for doc in docs
-    ])
+    # Previously uploaded document summaries, materialized per project
+    combined_summary, summary_version = await db.run_sync(get_project_summary, project_id)
+    combined_summary = await run_in_threadpool(fit_summary_to_context, combined_summary)
 
     # Read template if provided
     template_bytes = await template.read() if template else b""
 
+    retriever = await db.run_sync(project_retriever, project_id)
     brd_input = BRDInput(
-        prompt=f"{prompt}\n\nAnalyze the following summaries:\n{combined_summary}",
+        prompt=prompt,
         template=template_bytes,
-        support_documents=[]
+        support_documents=[],
+        presummarized=combined_summary,
+        retriever=retriever
     )
 
-    final_result = generate_final_brd(
+    final_result = await run_in_threadpool(
+        generate_final_brd,
         brd_input=brd_input,
         completion_answers=json.loads(completion_answers),
-        reworded_summary=f"{prompt}\n\n{combined_summary}"
+        reworded_summary=presummarized_context(prompt, combined_summary),
+        mode=mode
     )
 
     return {
         "brd_document": final_result["brd_document"],
-        "review_feedback": final_result["review_feedback"]
+        "review_feedback": final_result["review_feedback"],
+        "summary_version": summary_version
     }
+
+@router.post("/generate-final/stream")
+async def stream_brd_final(
+    project_id: int = Form(...),
+    prompt: str = Form(...),
+    completion_answers: Optional[str] = Form("{}"),
+    template: Optional[UploadFile] = File(None),
+    db: "AsyncSession" = Depends(auth.get_async_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    """Server-Sent Events version of /generate-final.
+
+    Emits ``brd_document`` events with draft tokens as they are generated,
+    then ``review_feedback`` events for the review, then a final ``done``.
+    Each event's data is a JSON-encoded string.
+    """
+    await db.run_sync(load_member_project, project_id, current_user)
+
+    combined_summary, _ = await db.run_sync(get_project_summary, project_id)
+    retriever = await db.run_sync(project_retriever, project_id)
+
+    template_bytes = await template.read() if template else b""
+    answers = json.loads(completion_answers)
+
+    # A sync generator is iterated in Starlette's threadpool, so the blocking
+    # Groq stream does not hold up the event loop. Condensing an oversized
+    # summary happens in here too, after the response has started.
+    def event_stream():
+        try:
+            summary = fit_summary_to_context(combined_summary)
+            brd_input = BRDInput(
+                prompt=prompt,
+                template=template_bytes,
+                support_documents=[],
+                presummarized=summary,
+                retriever=retriever
+            )
+            for event, token in stream_final_brd(brd_input, answers, presummarized_context(prompt, summary)):
+                yield f"event: {event}\ndata: {json.dumps(token)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps(str(e))}\n\n"
+            return
+        yield "event: done\ndata: \"\"\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
     
 @router.get("/download")
 def download_brd_docx(
     project_id: int,
     db: Session = Depends(auth.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    if current_user not in project.group.members:
-        raise HTTPException(status_code=403, detail="Access denied")
+    project = load_member_project(db, project_id, current_user)
 
-    docs = db.query(models.Document).filter(models.Document.project_id == project_id).all()
-    combined_summary = "\n\n".join([
-        f"Document: {doc.summary_title or doc.filename}\n{doc.summary_description or ''}"
-        for doc in docs
-    ])
+    combined_summary, _ = get_project_summary(db, project_id)
 
     docx_text = f"Business Requirements Document for Project: {project.name}\n\n{combined_summary}"
 
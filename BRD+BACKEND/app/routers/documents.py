@@ -1,80 +1,167 @@
-from fastapi import APIRouter, File, UploadFile, Form, Depends, HTTPException
-from typing import List
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, File, UploadFile, Form, Depends, HTTPException, Response
+from typing import List, TYPE_CHECKING
+from sqlalchemy.orm import Session, undefer
+from fastapi.concurrency import run_in_threadpool
 from app import models, schemas, auth
-from app.v2_logic import process_single_document
-from app.services.file_storage import LocalFileStorage
-from PyPDF2 import PdfReader
-from docx import Document as DocxDocument
-import tempfile
+from app.utils.pagination import PageParams
+from app.services.file_storage import LocalFileStorage, UPLOAD_CHUNK_SIZE
+from app.services.document_jobs import document_jobs
+from app.services.project_summary import append_document_summary, rebuild_project_summary
+from app.services.vector_index import remove_document
+from app.services.deduplication import acquire_blob, release_blob, find_summarized_duplicate, copy_summary
+
+if TYPE_CHECKING:
+    # Annotation only: the asyncio extension needs greenlet, which is only
+    # required when DB_ASYNC_ENABLED is on.
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 storage = LocalFileStorage()
 
-def extract_text(file_bytes: bytes, content_type: str) -> str:
-    try:
-        if content_type == "application/pdf":
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                tmp.write(file_bytes)
-                tmp.flush()
-                reader = PdfReader(tmp.name)
-                return "\n".join(page.extract_text() or "" for page in reader.pages)
-
-        elif content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-                tmp.write(file_bytes)
-                tmp.flush()
-                doc = DocxDocument(tmp.name)
-                return "\n".join([para.text for para in doc.paragraphs])
-
-        elif content_type.startswith("text/"):
-            return file_bytes.decode("utf-8", errors="ignore")
-
-        return "Unsupported file format"
-    except Exception as e:
-        return f"Failed to extract file content: {e}"
-
-@router.post("/upload", response_model=schemas.DocumentOut)
+async def iter_upload(file: UploadFile):
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+@router.post("/upload", response_model=schemas.DocumentJobOut, status_code=202)
 async def upload_support_file(
     file: UploadFile = File(...),
     description: str = Form(...),
     project_id: int = Form(...),
-    db: Session = Depends(auth.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    db: "AsyncSession" = Depends(auth.get_async_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
+    project_exists = await db.run_sync(
+        lambda session: session.query(models.Project.id).filter(models.Project.id == project_id).first() is not None
+    )
+    if not project_exists:
         raise HTTPException(status_code=404, detail="Invalid project ID")
 
-    file_bytes = await file.read()
-    saved_path = storage.save(file_bytes, file.filename)
+    saved_path, content_hash, size = await storage.save_stream(iter_upload(file), file.filename)
 
-    extracted_text = extract_text(file_bytes, file.content_type)
-    print(f"Extracted text: {extracted_text}")
-    result = process_single_document(
-        file_content=extracted_text.encode("utf-8"),
-        description=description,
-        document_type=file.content_type,
-        session_folder="processed_docs"
-    )
+    def record_upload(db: Session):
+        blob = acquire_blob(db, content_hash, saved_path, size)
+        doc_db = models.Document(
+            filename=file.filename,
+            path=blob.path,
+            description=description,
+            content_hash=content_hash,
+            project_id=project_id,
+            uploaded_by=current_user.id
+        )
 
-    summary = result["summary"]
-    doc_db = models.Document(
-        filename=file.filename,
-        path=saved_path,
-        description=description,
-        summary_title=summary.get("title"),
-        summary_description=summary.get("description"),
-        project_id=project_id,
-        uploaded_by=current_user.id
-    )
-    db.add(doc_db)
+        duplicate = find_summarized_duplicate(db, content_hash)
+        if duplicate:
+            # Identical content was summarized before: reuse it, no LLM calls.
+            copy_summary(duplicate, doc_db)
+            job = models.DocumentJob(document=doc_db, content_type=file.content_type, status="completed")
+            db.add_all([doc_db, job])
+            db.flush()
+            append_document_summary(db, doc_db)
+        else:
+            # Extraction and summarization run on the job queue; the summary
+            # columns are filled in once the job completes.
+            job = models.DocumentJob(document=doc_db, content_type=file.content_type, status="queued")
+            db.add_all([doc_db, job])
+        db.commit()
+        db.refresh(job)
+        db.refresh(doc_db)
+        if job.status == "completed":
+            # summary_description is deferred and the refresh above leaves it
+            # unloaded; indexing reads it after this session call returns,
+            # where an AsyncSession can't lazy-load.
+            db.refresh(doc_db, attribute_names=["summary_description"])
+        return blob.path, doc_db, job
+
+    blob_path, doc_db, job = await db.run_sync(record_upload)
+    if blob_path != saved_path:
+        # Same content was stored earlier under another extension.
+        storage.delete(saved_path)
+
+    if job.status == "completed":
+        await run_in_threadpool(document_jobs.index, doc_db)
+    else:
+        document_jobs.enqueue(job.id)
+    return job
+
+@router.get("/jobs/{job_id}", response_model=schemas.DocumentJobOut)
+def get_upload_job(job_id: int, db: Session = Depends(auth.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
+    job = db.query(models.DocumentJob).filter(models.DocumentJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not auth.is_project_member(db, job.document.project_id, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+    return job
+
+@router.post("/jobs/{job_id}/resume", response_model=schemas.DocumentJobOut)
+def resume_upload_job(job_id: int, db: Session = Depends(auth.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
+    job = db.query(models.DocumentJob).filter(models.DocumentJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not auth.is_project_member(db, job.document.project_id, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+    if job.status != "failed":
+        raise HTTPException(status_code=400, detail=f"Only failed jobs can be resumed (job is {job.status})")
+
+    job.status = "queued"
+    job.error = None
     db.commit()
-    db.refresh(doc_db)
+    db.refresh(job)
+
+    document_jobs.enqueue(job.id)
+    return job
+
+DOCUMENT_LIST_FIELDS = ("id", "filename", "description", "summary_title", "project_id")
+
+@router.get("/project/{project_id}", response_model=List[schemas.DocumentListOut], response_model_exclude_unset=True)
+def list_documents(
+    project_id: int,
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(auth.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    if not auth.is_project_member(db, project_id, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+    # Only the listing columns; full summaries come from GET /{document_id}.
+    columns = [getattr(models.Document, name) for name in page.select(DOCUMENT_LIST_FIELDS)]
+    query = db.query(*columns).filter(models.Document.project_id == project_id)
+    return page.page(query, models.Document.id, response)
+
+@router.get("/{document_id}", response_model=schemas.DocumentOut)
+def get_document(document_id: int, db: Session = Depends(auth.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
+    doc = (
+        db.query(models.Document)
+        .options(undefer(models.Document.summary_description))
+        .filter(models.Document.id == document_id)
+        .first()
+    )
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if not auth.is_project_member(db, doc.project_id, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+    return doc
 
-    return doc_db
+@router.delete("/{document_id}")
+def delete_document(document_id: int, db: Session = Depends(auth.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
+    doc = db.query(models.Document).filter(models.Document.id == document_id).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if not auth.is_project_member(db, doc.project_id, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    project_id = doc.project_id
+    # Documents from before content hashing own their file outright.
+    unused_path = release_blob(db, doc.content_hash) if doc.content_hash else doc.path
+    db.query(models.DocumentJob).filter(models.DocumentJob.document_id == document_id).delete()
+    db.delete(doc)
+    db.flush()
+    rebuild_project_summary(db, project_id)
+    db.commit()
 
-@router.get("/project/{project_id}", response_model=List[schemas.DocumentOut])
-def list_documents(project_id: int, db: Session = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_user)):
-    docs = db.query(models.Document).filter(models.Document.project_id == project_id).all()
-    return docs
+    if unused_path:
+        storage.delete(unused_path)
+    remove_document(project_id, document_id)
+    return {"message": "Document deleted successfully"}
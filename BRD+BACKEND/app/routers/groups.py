@@ -1,37 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from app import models, schemas, auth
+from app.utils.pagination import PageParams
+from app.services.membership import membership_cache
 
 router = APIRouter()
 
 @router.post("/", response_model=schemas.GroupOut)
-def create_group(group: schemas.GroupCreate, db: Session = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def create_group(group: schemas.GroupCreate, db: Session = Depends(auth.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
+    user = db.query(models.User).filter(models.User.id == current_user.id).first()
     new_group = models.Group(name=group.name, created_by=current_user.id)
-    new_group.members.append(current_user)  # auto-add creator as member
+    new_group.members.append(user)  # auto-add creator as member
     db.add(new_group)
     db.commit()
     db.refresh(new_group)
     return new_group
 
 @router.post("/{group_id}/join")
-def join_group(group_id: int, db: Session = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def join_group(group_id: int, db: Session = Depends(auth.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     group = db.query(models.Group).filter(models.Group.id == group_id).first()
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
 
-    if current_user in group.members:
+    if auth.is_group_member(db, group.id, current_user):
         raise HTTPException(status_code=400, detail="Already a member")
 
-    group.members.append(current_user)
+    user = db.query(models.User).filter(models.User.id == current_user.id).first()
+    group.members.append(user)
     db.commit()
+    membership_cache.invalidate(current_user.id, group_id)
     return {"message": "Joined group successfully"}
 
-@router.get("/my", response_model=list[schemas.GroupOut])
-def my_groups(db: Session = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_user)):
-    return current_user.groups
+GROUP_LIST_FIELDS = ("id", "name", "created_by")
+
+@router.get("/my", response_model=list[schemas.GroupListOut], response_model_exclude_unset=True)
+def my_groups(
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(auth.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    # Keyset on group id walks the (user_id, group_id) primary key of group_members.
+    columns = [getattr(models.Group, name) for name in page.select(GROUP_LIST_FIELDS)]
+    query = (
+        db.query(*columns)
+        .join(models.group_members, models.group_members.c.group_id == models.Group.id)
+        .filter(models.group_members.c.user_id == current_user.id)
+    )
+    return page.page(query, models.Group.id, response)
 
 @router.delete("/{group_id}")
-def delete_group(group_id: int, db: Session = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def delete_group(group_id: int, db: Session = Depends(auth.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     group = db.query(models.Group).filter(models.Group.id == group_id).first()
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
@@ -40,5 +59,6 @@ def delete_group(group_id: int, db: Session = Depends(auth.get_db), current_user
     
     db.delete(group)
     db.commit()
+    membership_cache.invalidate_group(group_id)
     return {"message": "Group deleted successfully"}
 
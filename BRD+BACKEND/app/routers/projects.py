@@ -1,16 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from app import models, schemas, auth
+from app.utils.pagination import PageParams
 
 router = APIRouter()
 
 @router.post("/group/{group_id}", response_model=schemas.ProjectOut)
-def create_project(group_id: int, project: schemas.ProjectCreate, db: Session = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def create_project(group_id: int, project: schemas.ProjectCreate, db: Session = Depends(auth.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     group = db.query(models.Group).filter(models.Group.id == group_id).first()
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
 
-    if current_user not in group.members:
+    if not auth.is_group_member(db, group.id, current_user):
         raise HTTPException(status_code=403, detail="Not a member of this group")
 
     new_project = models.Project(
@@ -24,20 +25,29 @@ def create_project(group_id: int, project: schemas.ProjectCreate, db: Session =
     db.refresh(new_project)
     return new_project
 
-@router.get("/group/{group_id}", response_model=list[schemas.ProjectOut])
-def list_projects(group_id: int, db: Session = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_user)):
+PROJECT_LIST_FIELDS = ("id", "name", "description", "group_id", "created_by")
+
+@router.get("/group/{group_id}", response_model=list[schemas.ProjectListOut], response_model_exclude_unset=True)
+def list_projects(
+    group_id: int,
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(auth.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
     group = db.query(models.Group).filter(models.Group.id == group_id).first()
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
 
-    if current_user not in group.members:
+    if not auth.is_group_member(db, group.id, current_user):
         raise HTTPException(status_code=403, detail="Not a member of this group")
 
-    projects = db.query(models.Project).filter(models.Project.group_id == group_id).all()
-    return projects
+    columns = [getattr(models.Project, name) for name in page.select(PROJECT_LIST_FIELDS)]
+    query = db.query(*columns).filter(models.Project.group_id == group_id)
+    return page.page(query, models.Project.id, response)
 
 @router.delete("/{project_id}")
-def delete_project(project_id: int, db: Session = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def delete_project(project_id: int, db: Session = Depends(auth.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -1,32 +1,55 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
 from app import models, schemas, auth
-from app.utils.jwt import create_access_token
+from app.utils.jwt import create_access_token, create_refresh_token, verify_refresh_token
 
 router = APIRouter()
 
 @router.post("/register", response_model=schemas.UserOut)
-def register(user: schemas.UserCreate, db: Session = Depends(auth.get_db)):
-    existing = db.query(models.User).filter(models.User.email == user.email).first()
+async def register(user: schemas.UserCreate, db: Session = Depends(auth.get_db)):
+    existing = await run_in_threadpool(lambda: db.query(models.User).filter(models.User.email == user.email).first())
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
-    
-    hashed_pw = auth.hash_password(user.password)
+
+    # bcrypt runs on the bounded hashing pool, like login.
+    hashed_pw = await auth.hash_password(user.password)
     db_user = models.User(email=user.email, hashed_password=hashed_pw, name=user.name)
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+
+    def save():
+        db.add(db_user)
+        db.commit()
+        db.refresh(db_user)
+        return db_user
+
+    return await run_in_threadpool(save)
+
+def token_response(user: models.User):
+    return {
+        # email/name let get_current_user build the principal without a DB lookup.
+        "access_token": create_access_token(data={"user_id": user.id, "email": user.email, "name": user.name}),
+        "refresh_token": create_refresh_token(data={"user_id": user.id}),
+        "token_type": "bearer",
+    }
 
 @router.post("/login", response_model=schemas.Token)
-def login(user: schemas.UserLogin, db: Session = Depends(auth.get_db)):
-    db_user = auth.authenticate_user(db, user.email, user.password)
+async def login(user: schemas.UserLogin, db: Session = Depends(auth.get_db)):
+    db_user = await auth.authenticate_user(db, user.email, user.password)
     if not db_user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    token = create_access_token(data={"user_id": db_user.id})
-    return {"access_token": token, "token_type": "bearer"}
+    return token_response(db_user)
+
+@router.post("/refresh", response_model=schemas.Token)
+def refresh(body: schemas.RefreshRequest, db: Session = Depends(auth.get_db)):
+    user_id = verify_refresh_token(body.refresh_token)
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    db_user = db.query(models.User).filter(models.User.id == user_id).first()
+    if not db_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    return token_response(db_user)
 
 @router.get("/me", response_model=schemas.UserOut)
-def get_me(current_user: models.User = Depends(auth.get_current_user)):
+def get_me(current_user: auth.Principal = Depends(auth.get_current_user)):
     return current_user
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional
+from datetime import datetime
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -20,8 +21,12 @@ class UserOut(BaseModel):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class TokenData(BaseModel):
     user_id: Optional[int] = None
 
@@ -61,3 +66,37 @@ class DocumentOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+# Listing schemas: every field but id is optional because list endpoints
+# return only the columns named in ?fields=.
+class DocumentListOut(BaseModel):
+    id: int
+    filename: Optional[str] = None
+    description: Optional[str] = None
+    summary_title: Optional[str] = None
+    project_id: Optional[int] = None
+
+class ProjectListOut(BaseModel):
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    group_id: Optional[int] = None
+    created_by: Optional[int] = None
+
+class GroupListOut(BaseModel):
+    id: int
+    name: Optional[str] = None
+    created_by: Optional[int] = None
+
+class DocumentJobOut(BaseModel):
+    id: int
+    document_id: int
+    status: str
+    total_chunks: int
+    processed_chunks: int
+    error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,49 @@
+import logging
+from typing import Any, Dict
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app import models
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkCheckpointStore:
+    """Per-chunk summaries persisted as they finish, keyed by document hash and chunk index.
+
+    ``total_chunks`` is part of the key, so checkpoints written under a
+    different chunk size are simply not found.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def load(self, document_hash: str, total_chunks: int) -> Dict[int, Dict[str, Any]]:
+        rows = self.db.query(models.ChunkCheckpoint).filter(
+            models.ChunkCheckpoint.document_hash == document_hash,
+            models.ChunkCheckpoint.total_chunks == total_chunks
+        ).all()
+        return {
+            row.chunk_index: {
+                "title": row.title,
+                "description": row.description,
+                "chunk_number": row.chunk_index + 1,
+                "total_chunks": row.total_chunks,
+            }
+            for row in rows
+        }
+
+    def save(self, document_hash: str, summary: Dict[str, Any]):
+        checkpoint = models.ChunkCheckpoint(
+            document_hash=document_hash,
+            chunk_index=summary["chunk_number"] - 1,
+            total_chunks=summary["total_chunks"],
+            title=summary.get("title"),
+            description=summary.get("description")
+        )
+        self.db.add(checkpoint)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Another job processing the same content got there first.
+            self.db.rollback()
+            logger.info(f"Checkpoint for chunk {checkpoint.chunk_index} of {document_hash} already exists")
@@ -0,0 +1,52 @@
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, undefer
+from app import models
+
+
+def _select_locked(db: Session, sha256: str) -> Optional[models.StoredBlob]:
+    return db.query(models.StoredBlob).filter(models.StoredBlob.sha256 == sha256).with_for_update().first()
+
+
+def acquire_blob(db: Session, sha256: str, path: str, size: int) -> models.StoredBlob:
+    """Register one more Document reference to the blob with this content hash."""
+    blob = _select_locked(db, sha256)
+    if blob is None:
+        blob = models.StoredBlob(sha256=sha256, path=path, size=size, ref_count=0)
+        try:
+            with db.begin_nested():
+                db.add(blob)
+        except IntegrityError:
+            # A concurrent first upload of the same content inserted it;
+            # wait for and lock theirs.
+            blob = _select_locked(db, sha256)
+    blob.ref_count = (blob.ref_count or 0) + 1
+    return blob
+
+
+def release_blob(db: Session, sha256: str) -> Optional[str]:
+    """Drop one reference; returns the file path once nothing refers to it."""
+    blob = _select_locked(db, sha256)
+    if blob is None:
+        return None
+    blob.ref_count = (blob.ref_count or 0) - 1
+    if blob.ref_count > 0:
+        return None
+    db.delete(blob)
+    return blob.path
+
+
+def find_summarized_duplicate(db: Session, content_hash: str, exclude_id: Optional[int] = None) -> Optional[models.Document]:
+    """Any document, in any project, with the same content and a finished summary."""
+    query = db.query(models.Document).options(undefer(models.Document.summary_description)).filter(
+        models.Document.content_hash == content_hash,
+        models.Document.summary_description.isnot(None)
+    )
+    if exclude_id is not None:
+        query = query.filter(models.Document.id != exclude_id)
+    return query.order_by(models.Document.id).first()
+
+
+def copy_summary(source: models.Document, target: models.Document):
+    target.summary_title = source.summary_title
+    target.summary_description = source.summary_description
@@ -0,0 +1,182 @@
+import os
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from app import models
+from app.database import SessionLocal
+from app.services.project_summary import append_document_summary
+from app.services.deduplication import find_summarized_duplicate, copy_summary
+from app.services.checkpoints import ChunkCheckpointStore
+from app.services.vector_index import index_document
+from app.services.text_extraction import extract_text
+from app.v2_logic import process_single_document
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_JOB_WORKERS = int(os.getenv("DOCUMENT_JOB_WORKERS", "2"))
+# A running job whose updated_at is older than this is presumed orphaned by a
+# dead process and may be claimed again. Running jobs heartbeat at a third of it.
+DOCUMENT_JOB_STALE_SECONDS = int(os.getenv("DOCUMENT_JOB_STALE_SECONDS", "120"))
+
+
+def claim_job(db: Session, job_id: int, now: Optional[datetime] = None) -> bool:
+    """Atomically mark a queued (or stale running) job as running.
+
+    Every uvicorn worker runs its own queue, so this conditional UPDATE is
+    what keeps two of them from processing the same job.
+    """
+    now = now or datetime.utcnow()
+    stale_before = now - timedelta(seconds=DOCUMENT_JOB_STALE_SECONDS)
+    claimed = db.query(models.DocumentJob).filter(
+        models.DocumentJob.id == job_id,
+        or_(
+            models.DocumentJob.status == "queued",
+            and_(models.DocumentJob.status == "running", models.DocumentJob.updated_at < stale_before),
+        ),
+    ).update(
+        {"status": "running", "processed_chunks": 0, "error": None, "updated_at": now},
+        synchronize_session=False,
+    )
+    db.commit()
+    return claimed == 1
+
+
+class DocumentJobQueue:
+    """In-process worker pool for document extraction and summarization.
+
+    The ``document_jobs`` table is the queue: a job row is written by the
+    upload handler, and workers only receive its id; ``claim_job`` decides
+    which worker actually runs it. ``recover`` runs at startup and then
+    periodically, re-queueing queued jobs and running jobs whose heartbeat
+    has gone stale. A job already waiting in (or running on) this process's
+    executor is not submitted again.
+    Finished chunks are checkpointed, so a re-run job (after a crash or via
+    the resume endpoint) only summarizes the chunks that are still missing.
+    """
+
+    def __init__(self, max_workers: int = DOCUMENT_JOB_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="document-job")
+        self._submitted = set()
+        self._submitted_lock = threading.Lock()
+
+    def enqueue(self, job_id: int):
+        with self._submitted_lock:
+            if job_id in self._submitted:
+                return
+            self._submitted.add(job_id)
+        self.executor.submit(self.run, job_id)
+
+    def recover(self):
+        stale_before = datetime.utcnow() - timedelta(seconds=DOCUMENT_JOB_STALE_SECONDS)
+        db = SessionLocal()
+        try:
+            pending = db.query(models.DocumentJob.id).filter(or_(
+                models.DocumentJob.status == "queued",
+                and_(models.DocumentJob.status == "running", models.DocumentJob.updated_at < stale_before),
+            )).all()
+        except Exception as e:
+            logger.error(f"Document job recovery failed: {e}")
+            pending = []
+        finally:
+            db.close()
+        for (job_id,) in pending:
+            if job_id not in self._submitted:
+                logger.info(f"Re-queueing document job {job_id}")
+            self.enqueue(job_id)
+
+        sweep = threading.Timer(DOCUMENT_JOB_STALE_SECONDS, self.recover)
+        sweep.daemon = True
+        sweep.start()
+
+    def _heartbeat(self, job_id: int, stop: threading.Event):
+        while not stop.wait(DOCUMENT_JOB_STALE_SECONDS / 3):
+            db = SessionLocal()
+            try:
+                db.query(models.DocumentJob).filter(
+                    models.DocumentJob.id == job_id, models.DocumentJob.status == "running"
+                ).update({"updated_at": datetime.utcnow()}, synchronize_session=False)
+                db.commit()
+            except Exception as e:
+                logger.warning(f"Heartbeat for document job {job_id} failed: {e}")
+            finally:
+                db.close()
+
+    def index(self, document: models.Document):
+        # The retrieval index is an optimization; a failure here must not
+        # fail an otherwise finished upload.
+        try:
+            index_document(document.project_id, document.id, document.summary_title, document.summary_description)
+        except Exception as e:
+            logger.error(f"Failed to index document {document.id}: {e}")
+
+    def run(self, job_id: int):
+        db = SessionLocal()
+        stop_heartbeat = threading.Event()
+        try:
+            if not claim_job(db, job_id):
+                return
+            threading.Thread(target=self._heartbeat, args=(job_id, stop_heartbeat), daemon=True).start()
+            job = db.query(models.DocumentJob).filter(models.DocumentJob.id == job_id).first()
+            document = job.document
+
+            def report_progress(processed: int, total: int):
+                job.processed_chunks = processed
+                job.total_chunks = total
+                db.commit()
+
+            duplicate = find_summarized_duplicate(db, document.content_hash, exclude_id=document.id) if document.content_hash else None
+            if duplicate:
+                # An identical upload finished while this job was queued.
+                copy_summary(duplicate, document)
+                append_document_summary(db, document)
+                job.status = "completed"
+                db.commit()
+                self.index(document)
+                return
+
+            extracted_text = extract_text(document.path, job.content_type)
+            result = process_single_document(
+                file_content=extracted_text.encode("utf-8"),
+                description=document.description,
+                document_type=job.content_type,
+                session_folder="processed_docs",
+                progress_callback=report_progress,
+                checkpoints=ChunkCheckpointStore(db),
+                checkpoint_key=document.content_hash
+            )
+
+            summary = result["summary"]
+            if result["path"]:
+                document.summary_title = summary.get("title")
+                document.summary_description = summary.get("description")
+                append_document_summary(db, document)
+                job.status = "completed"
+            else:
+                job.status = "failed"
+                job.error = summary.get("description")
+            db.commit()
+            if job.status == "completed":
+                self.index(document)
+        except Exception as e:
+            logger.error(f"Document job {job_id} failed: {e}")
+            db.rollback()
+            job = db.query(models.DocumentJob).filter(models.DocumentJob.id == job_id).first()
+            if job:
+                job.status = "failed"
+                job.error = str(e)
+                db.commit()
+        finally:
+            stop_heartbeat.set()
+            db.close()
+            with self._submitted_lock:
+                self._submitted.discard(job_id)
+
+
+document_jobs = DocumentJobQueue()
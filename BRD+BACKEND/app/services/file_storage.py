@@ -1,11 +1,15 @@
 import os
 import uuid
+import hashlib
+import aiofiles
+from typing import AsyncIterator, Tuple
 # import boto3
 # from google.cloud import storage
 
 
 
 UPLOAD_DIR = "uploads"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 class LocalFileStorage:
     def __init__(self, base_dir: str = UPLOAD_DIR):
@@ -20,6 +24,35 @@ class LocalFileStorage:
             f.write(file_bytes)
         return path
 
+    async def save_stream(self, chunks: AsyncIterator[bytes], original_filename: str) -> Tuple[str, str, int]:
+        """Spool an upload to disk chunk by chunk, hashing it on the way.
+
+        Returns ``(path, sha256_hex, size)``. Files are content-addressed:
+        the data is written to a ``.part`` file and then moved to
+        ``<sha256><ext>``, so identical uploads end up as a single file.
+        """
+        ext = os.path.splitext(original_filename)[1]
+        part_path = os.path.join(self.base_dir, f"{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(part_path, "wb") as f:
+                async for chunk in chunks:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    await f.write(chunk)
+            sha256 = digest.hexdigest()
+            path = os.path.join(self.base_dir, f"{sha256}{ext}")
+            if os.path.exists(path):
+                os.remove(part_path)
+            else:
+                os.replace(part_path, path)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        return path, sha256, size
+
     def delete(self, path: str):
         if os.path.exists(path):
             os.remove(path)
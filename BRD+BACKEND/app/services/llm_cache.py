@@ -0,0 +1,116 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+
+
+class LLMResponseCache:
+    """Content-addressed cache of LLM completions backed by a local SQLite file.
+
+    Entries are keyed by a SHA-256 of (model, agent version, rendered prompt).
+    Entries older than ``ttl_seconds`` are treated as misses, and once the table
+    grows past ``max_entries`` the least recently used rows are evicted.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    agent TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_accessed ON llm_cache (last_accessed)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, agent_version: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model, agent_version, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE llm_cache SET last_accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, response: str, model: str, agent: str):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, agent, response, created_at, last_accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, agent, response, now, now),
+            )
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            (count,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+            if count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY last_accessed ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def delete(self, key: str):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            (entries,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+        }
+
+
+llm_cache = LLMResponseCache() if LLM_CACHE_ENABLED else None
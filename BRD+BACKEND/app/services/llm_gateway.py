@@ -0,0 +1,217 @@
+import os
+import time
+import queue
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, CancelledError, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Iterator, List, Optional
+import httpx
+from dotenv import load_dotenv
+from groq import AsyncGroq, APIConnectionError, APIStatusError, APITimeoutError
+from app.services.rate_limiter import TokenBucketRateLimiter
+from app.utils.tokens import estimate_tokens
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LLM_GATEWAY_CONCURRENCY = int(os.getenv("LLM_GATEWAY_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "60"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+# Completion length assumed when charging a call against the tokens-per-minute
+# bucket, unless the call sets max_tokens.
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "1000"))
+
+_RETRYABLE_STATUS = {408, 409, 429}
+
+
+class LLMGateway:
+    """Single entry point for Groq chat completions.
+
+    An ``AsyncGroq`` client with a keep-alive httpx pool lives on a dedicated
+    event loop thread. Async callers ``await acomplete``; the synchronous
+    agents call ``complete``/``stream``, which hand the request to that loop.
+    Every call is bounded by a concurrency semaphore, waits for the shared
+    rate limiter, and is retried on 429, 5xx and connection errors with
+    jittered exponential backoff that honours the provider's ``retry-after``
+    header.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, max_concurrency: int = LLM_GATEWAY_CONCURRENCY,
+                 max_retries: int = LLM_MAX_RETRIES, rate_limiter: Optional[TokenBucketRateLimiter] = None):
+        self.max_retries = max_retries
+        self.rate_limiter = rate_limiter or TokenBucketRateLimiter()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="llm-gateway", daemon=True)
+        self._thread.start()
+
+        self.client = AsyncGroq(
+            api_key=api_key or os.getenv("GROQ_API_KEY"),
+            max_retries=0,  # retries are handled here so backoff is shared
+            timeout=LLM_TIMEOUT_SECONDS,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+                timeout=LLM_TIMEOUT_SECONDS,
+            ),
+        )
+        self._semaphore = asyncio.run_coroutine_threadsafe(self._make_semaphore(max_concurrency), self.loop).result()
+
+        self._metrics_lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def _make_semaphore(self, value: int) -> asyncio.Semaphore:
+        return asyncio.Semaphore(value)
+
+    # ------------ retry policy -------------
+
+    def _is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, (APIConnectionError, APITimeoutError)):
+            return True
+        if isinstance(error, APIStatusError):
+            return error.status_code in _RETRYABLE_STATUS or error.status_code >= 500
+        return False
+
+    def _backoff_seconds(self, error: Exception, attempt: int) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), LLM_BACKOFF_MAX_SECONDS)
+            except ValueError:
+                pass
+        # Full jitter: uniform over [0, base * 2^attempt], capped.
+        return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+    def _estimate_call_tokens(self, messages: List[Dict[str, str]], kwargs: Dict[str, Any]) -> int:
+        prompt_tokens = sum(estimate_tokens(message.get("content") or "") for message in messages)
+        return prompt_tokens + kwargs.get("max_tokens", LLM_EXPECTED_COMPLETION_TOKENS)
+
+    async def _with_retries(self, make_call, call_tokens: int):
+        attempt = 0
+        while True:
+            try:
+                # Every attempt, retries included, is charged to the shared buckets.
+                await self.rate_limiter.acquire(call_tokens)
+                return await make_call()
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    with self._metrics_lock:
+                        self.failures += 1
+                    raise
+                delay = self._backoff_seconds(e, attempt)
+                logger.warning(f"LLM call failed ({e.__class__.__name__}), retry {attempt + 1} in {delay:.1f}s")
+                with self._metrics_lock:
+                    self.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    def _record_latency(self, seconds: float):
+        with self._metrics_lock:
+            self.calls += 1
+            self._latencies.append(seconds)
+
+    # ------------ async API -------------
+
+    async def _complete_on_loop(self, messages: List[Dict[str, str]], model: str, **kwargs: Any) -> str:
+        async with self._semaphore:
+            started = time.perf_counter()
+            response = await self._with_retries(
+                lambda: self.client.chat.completions.create(messages=messages, model=model, **kwargs),
+                self._estimate_call_tokens(messages, kwargs)
+            )
+            self._record_latency(time.perf_counter() - started)
+            return response.choices[0].message.content
+
+    def submit(self, messages: List[Dict[str, str]], model: str, **kwargs: Any) -> Future:
+        """Schedule a completion and return a cancellable concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(self._complete_on_loop(messages, model, **kwargs), self.loop)
+
+    async def acomplete(self, messages: List[Dict[str, str]], model: str, **kwargs: Any) -> str:
+        return await asyncio.wrap_future(self.submit(messages, model, **kwargs))
+
+    # ------------ sync API -------------
+
+    def complete(self, messages: List[Dict[str, str]], model: str, cancel_event: Optional[threading.Event] = None,
+                 **kwargs: Any) -> str:
+        """Blocking completion. Setting ``cancel_event`` aborts the in-flight
+        request and raises ``concurrent.futures.CancelledError``."""
+        future = self.submit(messages, model, **kwargs)
+        if cancel_event is None:
+            return future.result()
+        while True:
+            try:
+                return future.result(timeout=0.1)
+            except FutureTimeoutError:
+                if cancel_event.is_set():
+                    future.cancel()
+                    raise CancelledError()
+
+    def stream(self, messages: List[Dict[str, str]], model: str, **kwargs: Any) -> Iterator[str]:
+        """Yield content deltas as they arrive.
+
+        Retries only cover opening the stream; once tokens have been yielded
+        an error is raised to the caller.
+        """
+        tokens: queue.Queue = queue.Queue()
+        done = object()
+
+        async def pump():
+            async with self._semaphore:
+                started = time.perf_counter()
+                try:
+                    stream = await self._with_retries(
+                        lambda: self.client.chat.completions.create(messages=messages, model=model, stream=True, **kwargs),
+                        self._estimate_call_tokens(messages, kwargs)
+                    )
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            tokens.put(delta)
+                    self._record_latency(time.perf_counter() - started)
+                except BaseException as e:
+                    tokens.put(e)
+                finally:
+                    tokens.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                item = tokens.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Consumer went away (e.g. client disconnected): stop generating.
+            future.cancel()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            latencies = sorted(self._latencies)
+            calls, retries, failures = self.calls, self.retries, self.failures
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+        return {
+            "calls": calls,
+            "retries": retries,
+            "failures": failures,
+            "latency_p50_seconds": percentile(0.5),
+            "latency_p95_seconds": percentile(0.95),
+            "rate_limiter": self.rate_limiter.metrics(),
+        }
+
+
+llm_gateway = LLMGateway()
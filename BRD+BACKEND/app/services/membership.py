@@ -0,0 +1,76 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from sqlalchemy import and_, exists
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from app import models
+
+load_dotenv()
+
+# Short on purpose: joins and group deletions invalidate explicitly, the TTL
+# only bounds staleness from changes made by other processes.
+MEMBERSHIP_CACHE_TTL_SECONDS = int(os.getenv("MEMBERSHIP_CACHE_TTL_SECONDS", "30"))
+MEMBERSHIP_CACHE_MAX_ENTRIES = int(os.getenv("MEMBERSHIP_CACHE_MAX_ENTRIES", "50000"))
+
+
+class MembershipCache:
+    """(user_id, group_id) -> is member, bounded LRU with a TTL."""
+
+    def __init__(self, max_entries: int = MEMBERSHIP_CACHE_MAX_ENTRIES, ttl_seconds: int = MEMBERSHIP_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, group_id: int):
+        key = (user_id, group_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.time():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, user_id: int, group_id: int, is_member: bool):
+        key = (user_id, group_id)
+        with self._lock:
+            self._entries[key] = (is_member, time.time() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int, group_id: int):
+        with self._lock:
+            self._entries.pop((user_id, group_id), None)
+
+    def invalidate_group(self, group_id: int):
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == group_id]:
+                del self._entries[key]
+
+
+membership_cache = MembershipCache()
+
+
+def is_group_member(db: Session, user_id: int, group_id: int) -> bool:
+    """One EXISTS lookup on the group_members primary key, cached briefly."""
+    cached = membership_cache.get(user_id, group_id)
+    if cached is not None:
+        return cached
+    is_member = db.query(
+        exists().where(and_(
+            models.group_members.c.user_id == user_id,
+            models.group_members.c.group_id == group_id,
+        ))
+    ).scalar()
+    membership_cache.set(user_id, group_id, is_member)
+    return is_member
+
+
+def is_project_member(db: Session, user_id: int, project_id: int) -> bool:
+    """Whether the user belongs to the project's group, without loading either."""
+    group_id = db.query(models.Project.group_id).filter(models.Project.id == project_id).scalar()
+    return group_id is not None and is_group_member(db, user_id, group_id)
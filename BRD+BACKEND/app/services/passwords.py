@@ -0,0 +1,70 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# bcrypt cost factor. Stored hashes with any other cost are rehashed on their
+# next successful login, so changing this migrates users gradually.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt releases the GIL, so one worker per core is the useful maximum.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+# Hash/verify calls allowed to queue behind busy workers before logins are
+# refused with 429 instead of piling up.
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+
+def make_password_context(rounds: int = BCRYPT_ROUNDS) -> CryptContext:
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+pwd_context = make_password_context()
+
+
+class PasswordHasherBusy(Exception):
+    """Every worker is busy and the pending queue is full."""
+
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, bounded thread pool off the event loop."""
+
+    def __init__(self, context: CryptContext, workers: int = PASSWORD_HASH_WORKERS,
+                 max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.context = context
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    async def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        # Release on completion of the work itself, not of the awaiting
+        # coroutine, so a disconnected client can't free a slot early.
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Returns (valid, new_hash); new_hash is set when the stored hash
+        should be replaced because its cost no longer matches BCRYPT_ROUNDS."""
+        if hashed_password is None:
+            # Spend the same time as a real check so unknown emails can't be
+            # told apart from wrong passwords.
+            await self._run(self.context.dummy_verify)
+            return False, None
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+
+password_hasher = PasswordHasher(pwd_context)
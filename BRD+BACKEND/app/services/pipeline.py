@@ -0,0 +1,114 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, CancelledError, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """One node of an agent pipeline.
+
+    ``func(deps, run)`` receives the results of the stages named in
+    ``depends_on`` as a dict, plus the running ``PipelineRun`` so a stage can
+    wait on or cancel stages it does not depend on (speculative work).
+    """
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any], "PipelineRun"], Any], depends_on: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+
+
+class PipelineRun:
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        self.futures: Dict[str, Future] = {}
+        self.cancel_events = {stage.name: threading.Event() for stage in stages}
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self._started_at = time.perf_counter()
+        self._submitted = threading.Condition()
+
+    def cancel_event(self, name: str) -> threading.Event:
+        """Set when ``name`` is cancelled; long-running stages should watch it."""
+        return self.cancel_events[name]
+
+    def cancel(self, name: str):
+        self.cancel_events[name].set()
+        with self._submitted:
+            future = self.futures.get(name)
+        if future is not None:
+            future.cancel()
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> Any:
+        """Block until another stage finishes and return its result."""
+        with self._submitted:
+            self._submitted.wait_for(lambda: name in self.futures, timeout=timeout)
+            future = self.futures[name]
+        return future.result(timeout=timeout)
+
+    def _record(self, name: str, started: float, status: str):
+        self.timings[name] = {
+            "started_at": round(started - self._started_at, 3),
+            "seconds": round(time.perf_counter() - started, 3),
+            "status": status,
+        }
+
+    def _run_stage(self, stage: Stage, deps: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            result = stage.func(deps, self)
+        except CancelledError:
+            self._record(stage.name, started, "cancelled")
+            raise
+        except Exception:
+            self._record(stage.name, started, "failed")
+            raise
+        self._record(stage.name, started, "cancelled" if self.cancel_events[stage.name].is_set() else "completed")
+        return result
+
+
+class PipelineRunner:
+    """Runs a DAG of stages on a thread pool, each as soon as its dependencies finish."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+
+    def run(self, stages: List[Stage]) -> PipelineRun:
+        run = PipelineRun(stages)
+        results: Dict[str, Any] = {}
+        pending = {stage.name: stage for stage in stages}
+        running: Dict[Future, str] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or len(stages)) as executor:
+            while pending or running:
+                ready = [stage for stage in pending.values() if all(dep in results for dep in stage.depends_on)]
+                for stage in ready:
+                    del pending[stage.name]
+                    deps = {dep: results[dep] for dep in stage.depends_on}
+                    future = executor.submit(run._run_stage, stage, deps)
+                    with run._submitted:
+                        run.futures[stage.name] = future
+                        run._submitted.notify_all()
+                    running[future] = stage.name
+
+                if not running:
+                    raise ValueError(f"Pipeline stages have unsatisfiable dependencies: {sorted(pending)}")
+
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except CancelledError:
+                        run.timings.setdefault(name, {"status": "cancelled"})
+                        results[name] = None
+                    except Exception:
+                        for other in list(running.values()) + list(pending):
+                            run.cancel(other)
+                        raise
+
+        run.results = results
+        logger.info(f"Pipeline timings: {run.timings}")
+        return run
@@ -0,0 +1,102 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from dotenv import load_dotenv
+from app import models
+from app.utils.jwt import ACCESS_TOKEN_EXPIRE_MINUTES
+
+load_dotenv()
+
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300"))
+
+
+class Principal:
+    """The authenticated user as route handlers see it: identity only, no ORM
+    session attached. Load the User row explicitly when a route needs it."""
+
+    def __init__(self, id: int, email: str, name: str):
+        self.id = id
+        self.email = email
+        self.name = name
+
+    @classmethod
+    def from_claims(cls, claims: Dict[str, Any]) -> Optional["Principal"]:
+        """Built from access-token claims; None for tokens issued without them."""
+        if not all(key in claims for key in ("user_id", "email", "name")):
+            return None
+        return cls(claims["user_id"], claims["email"], claims["name"])
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(user.id, user.email, user.name)
+
+
+class PrincipalCache:
+    """Bounded LRU of principals by user id, with a TTL per entry.
+
+    Entries are dropped whenever the User row is updated or deleted. The time
+    of that change is kept for one access-token lifetime so tokens issued
+    before it stop being trusted on their claims alone.
+    """
+
+    def __init__(self, max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES, ttl_seconds: int = PRINCIPAL_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._changed_at: "OrderedDict[int, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] < time.time():
+                self._entries.pop(user_id, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, principal: Principal):
+        with self._lock:
+            self._entries[principal.id] = (principal, time.time() + self.ttl_seconds)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        now = time.time()
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._changed_at.pop(user_id, None)
+            self._changed_at[user_id] = now
+            retention = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+            while self._changed_at and next(iter(self._changed_at.values())) < now - retention:
+                self._changed_at.popitem(last=False)
+
+    def changed_since(self, user_id: int, issued_at: Optional[float]) -> bool:
+        """Whether the user changed after a token issued at ``issued_at``."""
+        with self._lock:
+            changed_at = self._changed_at.get(user_id)
+        if changed_at is None:
+            return False
+        return issued_at is None or changed_at >= issued_at
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate(target.id)
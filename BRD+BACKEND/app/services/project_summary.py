@@ -0,0 +1,84 @@
+from typing import Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, undefer
+from app import models
+
+
+def format_document_summary(doc: models.Document) -> str:
+    return f"Document: {doc.summary_title or doc.filename}\n{doc.summary_description or ''}"
+
+
+def _select_locked(db: Session, project_id: int):
+    return (
+        db.query(models.ProjectSummary)
+        .filter(models.ProjectSummary.project_id == project_id)
+        .with_for_update()
+        .first()
+    )
+
+
+def _locked_summary(db: Session, project_id: int) -> Tuple[models.ProjectSummary, bool]:
+    """Lock the project's aggregate row, creating it if missing.
+
+    Returns ``(summary, created)``; a created row is empty and must be filled
+    by a full rebuild, since the project may already have documents.
+    """
+    summary = _select_locked(db, project_id)
+    if summary is not None:
+        return summary, False
+    summary = models.ProjectSummary(project_id=project_id, combined_summary="", document_count=0, version=0)
+    try:
+        with db.begin_nested():
+            db.add(summary)
+    except IntegrityError:
+        # Another job inserted the row first; wait for and lock theirs.
+        return _select_locked(db, project_id), False
+    return summary, True
+
+
+def _rebuild(db: Session, summary: models.ProjectSummary) -> models.ProjectSummary:
+    # SessionLocal doesn't autoflush; make pending document changes visible.
+    db.flush()
+    docs = (
+        db.query(models.Document)
+        .options(undefer(models.Document.summary_description))
+        .filter(models.Document.project_id == summary.project_id, models.Document.summary_description.isnot(None))
+        .order_by(models.Document.id)
+        .all()
+    )
+    summary.combined_summary = "\n\n".join(format_document_summary(doc) for doc in docs)
+    summary.document_count = len(docs)
+    summary.version = (summary.version or 0) + 1
+    return summary
+
+
+def rebuild_project_summary(db: Session, project_id: int) -> models.ProjectSummary:
+    """Recompute the aggregate from every summarized document in the project."""
+    summary, _ = _locked_summary(db, project_id)
+    return _rebuild(db, summary)
+
+
+def append_document_summary(db: Session, doc: models.Document) -> models.ProjectSummary:
+    """Add one newly summarized document to its project's aggregate.
+
+    The caller commits; the row lock taken here keeps concurrent upload jobs
+    from overwriting each other's appends. Projects without an aggregate yet
+    get a full rebuild, which includes ``doc``.
+    """
+    summary, created = _locked_summary(db, doc.project_id)
+    if created:
+        return _rebuild(db, summary)
+    section = format_document_summary(doc)
+    summary.combined_summary = f"{summary.combined_summary}\n\n{section}" if summary.combined_summary else section
+    summary.document_count = (summary.document_count or 0) + 1
+    summary.version = (summary.version or 0) + 1
+    return summary
+
+
+def get_project_summary(db: Session, project_id: int) -> Tuple[str, int]:
+    """Return ``(combined_summary, version)``, building the row on first use."""
+    summary = db.query(models.ProjectSummary).filter(models.ProjectSummary.project_id == project_id).first()
+    if summary is None:
+        summary = rebuild_project_summary(db, project_id)
+        db.commit()
+    return summary.combined_summary or "", summary.version
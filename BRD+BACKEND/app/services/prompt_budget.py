@@ -0,0 +1,88 @@
+import os
+import logging
+from typing import Dict, List
+from dotenv import load_dotenv
+from app.utils.tokens import estimate_tokens
+from app.utils.compaction import compact_text
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Prompt size for a single BRD creation call; llama3-70b-8192 shares its
+# 8192-token window between prompt and output.
+BRD_PROMPT_TOKEN_BUDGET = int(os.getenv("BRD_PROMPT_TOKEN_BUDGET", "5000"))
+
+
+class PromptSection:
+    """A variable part of a prompt.
+
+    Higher ``priority`` sections are trimmed last. ``compactable`` sections
+    may be whitespace/duplicate compacted; their paragraphs may be dropped
+    (last first) down to ``min_paragraphs``, and as a last resort the text is
+    cut to fit.
+    """
+
+    def __init__(self, name: str, text: str, priority: int, compactable: bool = True, min_paragraphs: int = 1):
+        self.name = name
+        self.text = text or ""
+        self.priority = priority
+        self.compactable = compactable
+        self.min_paragraphs = min_paragraphs
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+class PromptBudgeter:
+    def __init__(self, budget_tokens: int = BRD_PROMPT_TOKEN_BUDGET):
+        self.budget_tokens = budget_tokens
+
+    def fit(self, sections: List[PromptSection], overhead_tokens: int = 0) -> Dict[str, str]:
+        """Trim sections until they and the fixed prompt text fit the budget.
+
+        Returns the (possibly shortened) text of each section by name and logs
+        every trimming step taken.
+        """
+        budget = self.budget_tokens - overhead_tokens
+        trimmed = []
+
+        def over() -> int:
+            return sum(section.tokens for section in sections) - budget
+
+        if over() > 0:
+            for section in sections:
+                if section.compactable:
+                    before = section.tokens
+                    section.text = compact_text(section.text)
+                    if section.tokens < before:
+                        trimmed.append(f"compacted {section.name} ({before} -> {section.tokens} tokens)")
+
+        for section in sorted(sections, key=lambda s: s.priority):
+            if over() <= 0:
+                break
+            paragraphs = section.text.split("\n\n")
+            dropped = 0
+            while over() > 0 and len(paragraphs) > max(section.min_paragraphs, 1):
+                paragraphs.pop()
+                dropped += 1
+                section.text = "\n\n".join(paragraphs)
+            if dropped:
+                trimmed.append(f"dropped last {dropped} paragraph(s) of {section.name}")
+
+        for section in sorted(sections, key=lambda s: s.priority):
+            excess = over()
+            if excess <= 0:
+                break
+            keep_tokens = max(0, section.tokens - excess)
+            # estimate_tokens averages roughly three characters per token.
+            cut = section.text[:keep_tokens * 3]
+            while cut and estimate_tokens(cut) > keep_tokens:
+                cut = cut[:int(len(cut) * 0.9)]
+            trimmed.append(f"truncated {section.name} ({section.tokens} -> {estimate_tokens(cut)} tokens)")
+            section.text = cut
+
+        if trimmed:
+            logger.info(f"Prompt trimmed to fit {self.budget_tokens} tokens: {'; '.join(trimmed)}")
+        return {section.name: section.text for section in sections}
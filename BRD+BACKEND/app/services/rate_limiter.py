@@ -0,0 +1,124 @@
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", "rate_limits.sqlite3")
+# Defaults match Groq's published limits for llama3-70b-8192 on the free
+# tier; set to 0 to disable a bucket.
+GROQ_REQUESTS_PER_MINUTE = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+GROQ_TOKENS_PER_MINUTE = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "6000"))
+
+
+class TokenBucketRateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets shared by all workers.
+
+    Bucket levels live in a SQLite file, and every acquire is one
+    ``BEGIN IMMEDIATE`` transaction, so separate uvicorn processes draw from
+    the same budget. Callers that do not fit wait until the buckets refill
+    instead of failing.
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_PATH, requests_per_minute: float = GROQ_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = GROQ_TOKENS_PER_MINUTE, name: str = "groq"):
+        self.path = path
+        self.name = name
+        self.capacities = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self._metrics_lock = threading.Lock()
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.acquired = 0
+        self.total_wait_seconds = 0.0
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                    name TEXT PRIMARY KEY,
+                    level REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def try_acquire(self, tokens: int) -> float:
+        """Take one request and ``tokens`` tokens if available.
+
+        Returns 0 on success, otherwise the number of seconds until enough
+        capacity will have refilled (nothing is taken in that case).
+        """
+        now = time.time()
+        needs = {"requests": 1, "tokens": tokens}
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                levels = {}
+                wait = 0.0
+                for bucket, capacity in self.capacities.items():
+                    if capacity <= 0:
+                        continue
+                    key = f"{self.name}:{bucket}"
+                    row = conn.execute(
+                        "SELECT level, updated_at FROM rate_limit_buckets WHERE name = ?", (key,)
+                    ).fetchone()
+                    level = capacity if row is None else min(capacity, row[0] + (now - row[1]) * capacity / 60.0)
+                    # A single oversized call may take the whole bucket, but no more.
+                    need = min(needs[bucket], capacity)
+                    if level < need:
+                        wait = max(wait, (need - level) * 60.0 / capacity)
+                    levels[key] = level - need
+                if wait == 0:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO rate_limit_buckets (name, level, updated_at) VALUES (?, ?, ?)",
+                        [(key, level, now) for key, level in levels.items()],
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    async def acquire(self, tokens: int):
+        """Wait, without blocking the event loop, until the call fits the limits."""
+        started = time.perf_counter()
+        queued = False
+        try:
+            while True:
+                wait = await asyncio.to_thread(self.try_acquire, tokens)
+                if wait == 0:
+                    break
+                if not queued:
+                    queued = True
+                    with self._metrics_lock:
+                        self.queue_depth += 1
+                        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+                await asyncio.sleep(min(wait, 5.0))
+            with self._metrics_lock:
+                self.acquired += 1
+                self.total_wait_seconds += time.perf_counter() - started
+        finally:
+            if queued:
+                with self._metrics_lock:
+                    self.queue_depth -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "acquired": self.acquired,
+                "avg_wait_seconds": self.total_wait_seconds / self.acquired if self.acquired else 0.0,
+            }
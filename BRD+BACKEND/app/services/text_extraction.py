@@ -0,0 +1,132 @@
+import os
+import time
+import signal
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+from PyPDF2 import PdfReader
+from docx import Document as DocxDocument
+
+logger = logging.getLogger(__name__)
+
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+# Pages that take longer than this are skipped (left empty) rather than
+# stalling the whole document. Enforced with SIGALRM, so only on POSIX and
+# only where the pages are extracted on a main thread (the pool workers).
+PDF_PAGE_TIMEOUT_SECONDS = float(os.getenv("PDF_PAGE_TIMEOUT_SECONDS", "30"))
+# Below this many pages the pool start-up cost outweighs the parallelism.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PageTimeout(Exception):
+    pass
+
+
+def _raise_page_timeout(signum, frame):
+    raise PageTimeout()
+
+
+def _extract_page_range(path: str, start: int, end: int, page_timeout: float) -> List[Tuple[int, str, float, bool]]:
+    """Worker entry point: returns ``(page_index, text, seconds, timed_out)`` per page."""
+    use_alarm = page_timeout > 0 and hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_page_timeout)
+    reader = PdfReader(path)
+    results = []
+    try:
+        for index in range(start, end):
+            started = time.perf_counter()
+            timed_out = False
+            try:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, page_timeout)
+                text = reader.pages[index].extract_text() or ""
+            except PageTimeout:
+                text = ""
+                timed_out = True
+            except Exception as e:
+                logger.warning(f"Failed to extract page {index + 1} of {path}: {e}")
+                text = ""
+            finally:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            results.append((index, text, time.perf_counter() - started, timed_out))
+    finally:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, previous_handler)
+    return results
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # "spawn" because uploads are processed from worker threads, and
+            # forking a multi-threaded process is unsafe.
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def extract_pdf(path: str, workers: int = PDF_EXTRACTION_WORKERS, page_timeout: float = PDF_PAGE_TIMEOUT_SECONDS) -> Dict[str, Any]:
+    """Extract a PDF page by page, spreading page ranges over a process pool.
+
+    Returns the text in page order along with ``page_count``, per-page
+    ``page_timings`` (seconds) and the 1-based ``timed_out_pages``.
+    """
+    page_count = len(PdfReader(path).pages)
+    if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        results = _extract_page_range(path, 0, page_count, page_timeout)
+    else:
+        # A few ranges per worker so one slow range does not leave cores idle.
+        range_count = min(page_count, workers * 4)
+        step = -(-page_count // range_count)
+        pool = _get_pool()
+        futures = [
+            pool.submit(_extract_page_range, path, start, min(start + step, page_count), page_timeout)
+            for start in range(0, page_count, step)
+        ]
+        results = [page for future in futures for page in future.result()]
+
+    results.sort(key=lambda page: page[0])
+    return {
+        "text": "\n".join(text for _, text, _, _ in results),
+        "page_count": page_count,
+        "page_timings": [round(seconds, 4) for _, _, seconds, _ in results],
+        "timed_out_pages": [index + 1 for index, _, _, timed_out in results if timed_out],
+    }
+
+
+def extract_text(path: str, content_type: str) -> str:
+    """Extract plain text from a stored upload.
+
+    Extractors open the file by path, so the upload is never copied into
+    memory or into a temporary file first.
+    """
+    try:
+        if content_type == "application/pdf":
+            started = time.perf_counter()
+            result = extract_pdf(path)
+            logger.info(f"Extracted {result['page_count']} pages from {path} in {time.perf_counter() - started:.2f}s")
+            if result["timed_out_pages"]:
+                logger.warning(f"Pages timed out during extraction of {path}: {result['timed_out_pages']}")
+            return result["text"]
+
+        elif content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+            doc = DocxDocument(path)
+            return "\n".join([para.text for para in doc.paragraphs])
+
+        elif content_type.startswith("text/"):
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                return f.read()
+
+        return "Unsupported file format"
+    except Exception as e:
+        return f"Failed to extract file content: {e}"
@@ -0,0 +1,194 @@
+import os
+import re
+import zlib
+import fcntl
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from app import models
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = os.getenv("INDEX_DIR", "indexes")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1024"))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "6"))
+
+_WORD = re.compile(r"[a-z0-9]+")
+_CHUNK_MARKER = re.compile(r"^\(Chunk \d+ of \d+\):\n", re.MULTILINE)
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def embed_texts(texts: List[str], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Local embeddings: hashed unigrams and bigrams, log-scaled, L2-normalized.
+
+    No model download or API call; similarity is lexical, which is enough to
+    route a BRD section to the chunks that talk about the same things.
+    """
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        words = _WORD.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for feature in features:
+            vectors[row, zlib.crc32(feature.encode("utf-8")) % dim] += 1.0
+    np.log1p(vectors, out=vectors)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def split_summary_chunks(summary_description: str) -> List[str]:
+    """Recover the per-chunk summaries from a stored document summary."""
+    parts = [part.strip() for part in _CHUNK_MARKER.split(summary_description or "")]
+    return [part for part in parts if part]
+
+
+@contextmanager
+def _project_lock(project_id: int):
+    """Serializes index writes for a project across threads and processes
+    (every uvicorn worker runs its own job queue)."""
+    with _locks_guard:
+        thread_lock = _locks.setdefault(project_id, threading.Lock())
+    with thread_lock:
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        with open(os.path.join(INDEX_DIR, f"project_{project_id}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class ProjectIndex:
+    """Chunk-summary vectors for one project, persisted as ``indexes/project_<id>.npz``."""
+
+    def __init__(self, project_id: int, base_dir: str = INDEX_DIR):
+        self.project_id = project_id
+        self.path = os.path.join(base_dir, f"project_{project_id}.npz")
+        self.vectors = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self.texts = np.array([], dtype=object)
+        self.document_ids = np.array([], dtype=np.int64)
+
+    @classmethod
+    def load(cls, project_id: int, base_dir: str = INDEX_DIR) -> "ProjectIndex":
+        index = cls(project_id, base_dir)
+        if os.path.exists(index.path):
+            with np.load(index.path, allow_pickle=True) as data:
+                index.vectors = data["vectors"]
+                index.texts = data["texts"]
+                index.document_ids = data["document_ids"]
+        return index
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(tmp_path, vectors=self.vectors, texts=self.texts, document_ids=self.document_ids)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def remove(self, document_id: int):
+        keep = self.document_ids != document_id
+        self.vectors = self.vectors[keep]
+        self.texts = self.texts[keep]
+        self.document_ids = self.document_ids[keep]
+
+    def add(self, document_id: int, chunks: List[str]):
+        self.remove(document_id)
+        if not chunks:
+            return
+        self.vectors = np.vstack([self.vectors, embed_texts(chunks)])
+        self.texts = np.concatenate([self.texts, np.array(chunks, dtype=object)])
+        self.document_ids = np.concatenate([self.document_ids, np.full(len(chunks), document_id, dtype=np.int64)])
+
+    def indexed_document_ids(self) -> Set[int]:
+        return set(self.document_ids.tolist())
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K, document_ids: Optional[Set[int]] = None) -> List[Tuple[float, str]]:
+        """Top-k chunks by cosine similarity, optionally only from ``document_ids``."""
+        scores = self.vectors @ embed_texts([query])[0]
+        candidates = np.arange(len(scores))
+        if document_ids is not None:
+            candidates = candidates[np.isin(self.document_ids, list(document_ids))]
+        if not len(candidates):
+            return []
+        k = min(k, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), str(self.texts[i])) for i in top]
+
+
+def _document_chunks(title: Optional[str], summary_description: str) -> List[str]:
+    return [f"{title}\n{chunk}" if title else chunk for chunk in split_summary_chunks(summary_description)]
+
+
+def index_documents(project_id: int, documents: Iterable[Tuple[int, Optional[str], str]]) -> ProjectIndex:
+    """Add (or replace) summarized documents' chunks in their project's index.
+
+    ``documents`` are ``(document_id, title, summary_description)`` tuples.
+    """
+    with _project_lock(project_id):
+        index = ProjectIndex.load(project_id, INDEX_DIR)
+        for document_id, title, summary_description in documents:
+            index.add(document_id, _document_chunks(title, summary_description))
+        index.save()
+    return index
+
+
+def index_document(project_id: int, document_id: int, title: Optional[str], summary_description: str):
+    index_documents(project_id, [(document_id, title, summary_description)])
+
+
+def remove_document(project_id: int, document_id: int):
+    with _project_lock(project_id):
+        index = ProjectIndex.load(project_id, INDEX_DIR)
+        index.remove(document_id)
+        index.save()
+
+
+def project_retriever(db: Session, project_id: int):
+    """A ``retrieve(query, k) -> List[str]`` function over the project's
+    chunks, most relevant first.
+
+    Summarized documents missing from the index (e.g. summarized before
+    indexing existed, or whose indexing failed) are indexed first. Returns
+    None, so callers fall back to the full summary, when the project has no
+    summarized documents or the index can't be brought up to date.
+    """
+    summarized = {
+        document_id for (document_id,) in db.query(models.Document.id).filter(
+            models.Document.project_id == project_id,
+            models.Document.summary_description.isnot(None),
+        )
+    }
+    if not summarized:
+        return None
+
+    index = ProjectIndex.load(project_id, INDEX_DIR)
+    missing = summarized - index.indexed_document_ids()
+    if missing:
+        documents = db.query(
+            models.Document.id, models.Document.summary_title, models.Document.summary_description
+        ).filter(models.Document.id.in_(missing)).all()
+        try:
+            index = index_documents(project_id, documents)
+        except Exception as e:
+            logger.error(f"Failed to backfill retrieval index for project {project_id}: {e}")
+            return None
+        # Documents whose summary has no chunks never appear in the index.
+        empty = {document_id for document_id, title, summary in documents if not _document_chunks(title, summary)}
+        if summarized - empty - index.indexed_document_ids():
+            return None
+
+    def retrieve(query: str, k: int = RETRIEVAL_TOP_K) -> List[str]:
+        # Only live documents: chunks of deleted ones may linger until removed.
+        return [text for _, text in index.search(query, k, summarized)]
+
+    return retrieve
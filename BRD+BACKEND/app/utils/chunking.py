@@ -0,0 +1,115 @@
+import io
+import re
+from collections import deque
+from typing import Iterator, List, Tuple
+from app.utils.tokens import estimate_tokens
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_NUMBERED_HEADING = re.compile(r"^\d+(\.\d+)*\.?\s+\S")
+
+
+def is_heading(line: str) -> bool:
+    """Markdown headings, numbered headings ("2.1 Scope") and short ALL CAPS lines."""
+    stripped = line.strip()
+    if not stripped or len(stripped) > 120:
+        return False
+    if stripped.startswith("#"):
+        return True
+    if _NUMBERED_HEADING.match(stripped) and not stripped.endswith((".", ",", ";")):
+        return True
+    letters = [c for c in stripped if c.isalpha()]
+    return len(letters) >= 3 and stripped.isupper()
+
+
+def _split_by_characters(piece: str, max_tokens: int) -> Iterator[Tuple[str, int]]:
+    """Last resort for one word over the budget (CJK text, base64, PDF runs
+    without spaces): cut it into the longest slices that fit."""
+    start = 0
+    while start < len(piece):
+        end = min(len(piece), start + max_tokens * 4)
+        tokens = estimate_tokens(piece[start:end])
+        while tokens > max_tokens:
+            end = start + max(1, (end - start) * max_tokens // tokens)
+            tokens = estimate_tokens(piece[start:end])
+        yield piece[start:end], tokens
+        start = end
+
+
+def _split_long_line(line: str, max_tokens: int) -> Iterator[Tuple[str, int]]:
+    """Break a line that alone exceeds the budget at sentence, then word, then
+    character boundaries."""
+    for sentence in _SENTENCE_END.split(line):
+        tokens = estimate_tokens(sentence)
+        if tokens <= max_tokens:
+            yield sentence, tokens
+            continue
+        words = []
+        word_tokens = 0
+        for word in sentence.split(" "):
+            tokens = estimate_tokens(word)
+            if words and word_tokens + tokens > max_tokens:
+                yield " ".join(words), word_tokens
+                words = []
+                word_tokens = 0
+            if tokens > max_tokens:
+                yield from _split_by_characters(word, max_tokens)
+                continue
+            words.append(word)
+            word_tokens += tokens
+        if words:
+            yield " ".join(words), word_tokens
+
+
+def _units(text: str, max_tokens: int) -> Iterator[Tuple[str, int, bool]]:
+    """Yield ``(text, tokens, is_heading)`` for each line-sized unit of text."""
+    for raw_line in io.StringIO(text):
+        line = raw_line.rstrip("\n")
+        tokens = estimate_tokens(line)
+        if tokens <= max_tokens:
+            yield line, tokens, is_heading(line)
+        else:
+            for piece, piece_tokens in _split_long_line(line, max_tokens):
+                yield piece, piece_tokens, False
+
+
+def iter_chunks(text: str, max_tokens: int, overlap_tokens: int = 0) -> Iterator[str]:
+    """Split text into chunks of at most ``max_tokens`` estimated tokens.
+
+    Lines are accumulated in a list and each unit is measured once, so the
+    whole pass is linear in the size of the input. A heading starts a new
+    chunk once the current one is at least half full, and the trailing
+    ``overlap_tokens`` worth of lines are repeated at the start of the next
+    chunk so context is not cut mid-thought.
+    """
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+
+    def flush() -> Tuple[str, List[Tuple[str, int]], int]:
+        chunk = "\n".join(line for line, _ in current).strip()
+        carried: deque = deque()
+        carried_tokens = 0
+        for line, tokens in reversed(current):
+            if carried_tokens + tokens > overlap_tokens:
+                break
+            carried.appendleft((line, tokens))
+            carried_tokens += tokens
+        return chunk, list(carried), carried_tokens
+
+    for line, tokens, heading in _units(text, max_tokens):
+        full = current_tokens + tokens > max_tokens
+        at_section_break = heading and current_tokens >= max_tokens // 2
+        if current and (full or at_section_break):
+            chunk, current, current_tokens = flush()
+            if chunk:
+                yield chunk
+            if at_section_break or current_tokens + tokens > max_tokens:
+                # Never carry overlap across a heading or past the budget.
+                current, current_tokens = [], 0
+        current.append((line, tokens))
+        current_tokens += tokens
+
+    if current:
+        chunk = "\n".join(line for line, _ in current).strip()
+        if chunk:
+            yield chunk
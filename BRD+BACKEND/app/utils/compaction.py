@@ -0,0 +1,39 @@
+import re
+
+_INLINE_WHITESPACE = re.compile(r"[ \t]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+# Lines this short ("Yes", "N/A", bullets) legitimately repeat and are kept.
+_MIN_DEDUP_LINE_LENGTH = 20
+
+
+def compact_text(text: str) -> str:
+    """Shrink prompt context without changing its content.
+
+    Strips indentation and runs of spaces, collapses blank lines, and drops
+    paragraphs and lines that are exact repeats of earlier ones (document
+    summaries often restate the same points chunk after chunk).
+    """
+    seen_paragraphs = set()
+    seen_lines = set()
+    paragraphs = []
+    for paragraph in text.split("\n\n"):
+        lines = []
+        for line in paragraph.split("\n"):
+            line = _INLINE_WHITESPACE.sub(" ", line).strip()
+            if not line:
+                continue
+            key = line.lower()
+            if len(line) >= _MIN_DEDUP_LINE_LENGTH:
+                if key in seen_lines:
+                    continue
+                seen_lines.add(key)
+            lines.append(line)
+        if not lines:
+            continue
+        paragraph = "\n".join(lines)
+        key = paragraph.lower()
+        if key in seen_paragraphs:
+            continue
+        seen_paragraphs.add(key)
+        paragraphs.append(paragraph)
+    return _BLANK_LINES.sub("\n\n", "\n\n".join(paragraphs))
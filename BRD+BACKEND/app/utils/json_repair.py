@@ -0,0 +1,84 @@
+import json
+from typing import Any, Dict
+
+_CLOSERS = {"{": "}", "[": "]"}
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+
+def repair_json_object(text: str) -> str:
+    """Best-effort repair of the first JSON object in an LLM response, in one pass.
+
+    Handles the usual failure modes: prose or code fences around the object,
+    raw newlines and tabs inside strings, trailing commas, and output that
+    was cut off before the closing quotes/brackets.
+    """
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("No JSON object found in response")
+
+    out = []
+    stack = []
+    in_string = False
+    escaped = False
+    for char in text[start:]:
+        if in_string:
+            if escaped:
+                escaped = False
+                out.append(char)
+            elif char == "\\":
+                escaped = True
+                out.append(char)
+            elif char == '"':
+                in_string = False
+                out.append(char)
+            elif char in _CONTROL_ESCAPES:
+                out.append(_CONTROL_ESCAPES[char])
+            elif ord(char) < 0x20:
+                out.append(f"\\u{ord(char):04x}")
+            else:
+                out.append(char)
+            continue
+
+        if char == '"':
+            in_string = True
+            out.append(char)
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+            out.append(char)
+        elif char in "}]":
+            _drop_trailing_comma(out)
+            if stack and stack[-1] == char:
+                stack.pop()
+                out.append(char)
+            if not stack:
+                break
+        else:
+            out.append(char)
+
+    if in_string:
+        if escaped:
+            out.pop()
+        out.append('"')
+    _drop_trailing_comma(out)
+    while stack:
+        out.append(stack.pop())
+    return "".join(out)
+
+
+def _drop_trailing_comma(out):
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ",":
+        del out[index]
+
+
+def parse_json_object(text: str) -> Dict[str, Any]:
+    """json.loads with a single repair pass as fallback; the result must be an object."""
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = json.loads(repair_json_object(text))
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+    return data
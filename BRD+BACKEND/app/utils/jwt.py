@@ -9,16 +9,37 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+def _create_token(data: dict, token_type: str, expires_delta: timedelta):
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    to_encode.update({"iat": now, "exp": now + expires_delta, "type": token_type})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def verify_access_token(token: str):
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    return _create_token(data, "access", expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+
+def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
+    return _create_token(data, "refresh", expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+
+def _decode_token(token: str, token_type: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("user_id")
     except JWTError:
         return None
+    # Tokens issued before refresh tokens existed have no type and are access tokens.
+    if payload.get("type", "access") != token_type:
+        return None
+    return payload
+
+def decode_access_token(token: str) -> Optional[dict]:
+    return _decode_token(token, "access")
+
+def verify_access_token(token: str):
+    payload = decode_access_token(token)
+    return payload.get("user_id") if payload else None
+
+def verify_refresh_token(token: str):
+    payload = _decode_token(token, "refresh")
+    return payload.get("user_id") if payload else None
@@ -0,0 +1,67 @@
+import os
+import json
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Sequence
+from fastapi import HTTPException, Query, Response
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "200"))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """``limit``/``cursor``/``fields`` query parameters for list endpoints.
+
+    Pages are keyset-based: the cursor encodes the last id returned, so each
+    page is an index range scan no matter how deep it is. ``limit`` is capped
+    at MAX_PAGE_SIZE; ``fields`` is a comma-separated subset of the columns.
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+        cursor: Optional[str] = Query(None),
+        fields: Optional[str] = Query(None),
+    ):
+        self.limit = min(limit, MAX_PAGE_SIZE)
+        self.after_id = decode_cursor(cursor)
+        self.fields = fields
+
+    def select(self, allowed: Sequence[str]) -> List[str]:
+        """The requested fields, always including ``id`` (the cursor key)."""
+        if not self.fields:
+            return list(allowed)
+        requested = [name.strip() for name in self.fields.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in allowed]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        return ["id"] + [name for name in allowed if name in requested and name != "id"]
+
+    def page(self, query, key_column, response: Response) -> List[Dict[str, Any]]:
+        """Runs ``query`` (a column query including ``key_column``) for this
+        page and sets the next-page cursor header when there are more rows."""
+        if self.after_id is not None:
+            query = query.filter(key_column > self.after_id)
+        rows = query.order_by(key_column).limit(self.limit + 1).all()
+        if len(rows) > self.limit:
+            rows = rows[:self.limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(rows[-1], key_column.key))
+        return [dict(row._mapping) for row in rows]
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(data["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
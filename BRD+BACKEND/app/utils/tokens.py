@@ -0,0 +1,34 @@
+import re
+from typing import List
+
+# llama3 averages a little under four characters per token on English prose;
+# counting word pieces and punctuation separately tracks dense text better.
+_TOKEN_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap, dependency-free approximation of the model token count."""
+    if not text:
+        return 0
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def batch_by_tokens(sections: List[str], max_tokens: int) -> List[List[str]]:
+    """Greedily group consecutive sections so each group stays within max_tokens.
+
+    A section that is larger than the budget on its own gets a group to itself.
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+    for section in sections:
+        tokens = estimate_tokens(section)
+        if current and current_tokens + tokens > max_tokens:
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(section)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
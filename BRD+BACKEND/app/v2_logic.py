@@ -4,64 +4,204 @@ import re
 import uuid
 import datetime
 import logging
-from typing import List, Dict, Any, Union
+import threading
+from typing import List, Dict, Any, Callable, Iterator, Literal, Optional, Tuple, Type, TypeVar, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import BytesIO
 from docx import Document
 from docx.shared import Pt, Inches
 from docx.enum.style import WD_STYLE_TYPE
 from bs4 import BeautifulSoup
 import requests
-from groq import Groq
+from groq import BadRequestError
+from pydantic import BaseModel, ValidationError
+from app.services.llm_cache import llm_cache
+from app.services.llm_gateway import llm_gateway
+from app.services.checkpoints import ChunkCheckpointStore
+from app.services.pipeline import PipelineRun, PipelineRunner, Stage
+from app.services.vector_index import RETRIEVAL_TOP_K
+from app.services.prompt_budget import BRD_PROMPT_TOKEN_BUDGET, PromptBudgeter, PromptSection
+from app.utils.tokens import estimate_tokens, batch_by_tokens
+from app.utils.chunking import is_heading, iter_chunks
+from app.utils.json_repair import parse_json_object
+from app.utils.compaction import compact_text
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+LLM_MODEL = "llama3-70b-8192"
+# Ask Groq for response_format=json_object on the agents that expect JSON.
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "1") != "0"
+
+# Upper bound on chunk summaries sent to Groq at the same time.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# Size of each document chunk sent to RewordSummaryAgent, and how much of the
+# previous chunk is repeated at the start of the next one.
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "1500"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "100"))
+
+# Token budget for the combined project summary pasted into BRD prompts. The
+# rest of llama3-70b-8192's window is left for the template and the output.
+SUMMARY_CONTEXT_TOKENS = int(os.getenv("SUMMARY_CONTEXT_TOKENS", "3000"))
+# Input size of a single reduction call in the hierarchical summarizer.
+SUMMARY_BATCH_TOKENS = int(os.getenv("SUMMARY_BATCH_TOKENS", "4000"))
+
+# "single" writes the whole BRD in one completion; "sectioned" writes each
+# template section concurrently (see SectionedBRDCreationAgent).
+BRD_GENERATION_MODE = os.getenv("BRD_GENERATION_MODE", "single")
+BRD_GENERATION_MODES = ("single", "sectioned")
+
+
+def _passes(validate: Optional[Callable[[str], Any]], content: str) -> bool:
+    if validate is None:
+        return True
+    try:
+        validate(content)
+    except (ValueError, ValidationError):
+        return False
+    return True
+
+
+def chat_completion(prompt: str, agent: str, agent_version: str, model: str = LLM_MODEL, json_mode: bool = False,
+                    cancel_event: Optional[threading.Event] = None,
+                    validate: Optional[Callable[[str], Any]] = None) -> str:
+    """Send a single-message chat completion, serving repeats from the LLM cache.
+
+    With ``validate``, only responses it accepts (doesn't raise on) are
+    cached, and a cached response it rejects is evicted and regenerated, so
+    a bad generation is not replayed on retry.
+    """
+    key = None
+    if llm_cache is not None:
+        key = llm_cache.make_key(model, prompt, f"{agent}:{agent_version}{':json' if json_mode else ''}")
+        cached = llm_cache.get(key)
+        if cached is not None:
+            if _passes(validate, cached):
+                return cached
+            llm_cache.delete(key)
+
+    extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+    content = llm_gateway.complete([{"role": "user", "content": prompt}], model=model, cancel_event=cancel_event, **extra)
+
+    if key is not None and content and _passes(validate, content):
+        llm_cache.set(key, content, model=model, agent=agent)
+    return content
+
+
+def structured_completion(prompt: str, schema: Type[ModelT], agent: str, agent_version: str, model: str = LLM_MODEL) -> ModelT:
+    """Request a JSON object and validate it against a pydantic schema.
+
+    Uses the provider's JSON mode when LLM_JSON_MODE is on. Output that is
+    not valid JSON gets one tolerant repair pass instead of a regeneration;
+    raises ValueError or ValidationError if it still does not fit the schema.
+    """
+    def parse(raw: str) -> ModelT:
+        return schema.parse_obj(parse_json_object(raw))
+
+    try:
+        raw_output = chat_completion(prompt, agent=agent, agent_version=agent_version, model=model,
+                                     json_mode=LLM_JSON_MODE, validate=parse)
+    except BadRequestError as e:
+        # Groq rejects JSON-mode output that fails its own validation, but
+        # returns the generation, which is usually repairable.
+        error = (e.body or {}).get("error", e.body) if isinstance(e.body, dict) else None
+        raw_output = error.get("failed_generation") if isinstance(error, dict) else None
+        if not raw_output:
+            raise
+    return parse(raw_output)
+
+
+def stream_chat_completion(prompt: str, agent: str, agent_version: str, model: str = LLM_MODEL) -> Iterator[str]:
+    """Like chat_completion, but yields the response as it is generated."""
+    key = None
+    if llm_cache is not None:
+        key = llm_cache.make_key(model, prompt, f"{agent}:{agent_version}")
+        cached = llm_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
+    for delta in llm_gateway.stream([{"role": "user", "content": prompt}], model=model):
+        parts.append(delta)
+        yield delta
+
+    content = "".join(parts)
+    if key is not None and content:
+        llm_cache.set(key, content, model=model, agent=agent)
+
+
+class ChunkSummary(BaseModel):
+    title: str
+    description: str
+
+
+class CompletionAnalysis(BaseModel):
+    status: Literal["need", "not_need"]
+    details: List[str] = []
+
 
 class SupportDocument:
-    def __init__(self, file_content: bytes, description: str, document_type: str):
+    def __init__(self, file_content: bytes, description: str, document_type: str, checkpoint_key: Optional[str] = None):
         self.file_content = file_content
         self.description = description
         self.document_type = document_type
+        # Identifies the document's chunk checkpoints (its content hash).
+        self.checkpoint_key = checkpoint_key
 
 class BRDInput:
-    def __init__(self, prompt: str, template: bytes, support_documents: List[SupportDocument]):
+    def __init__(self, prompt: str, template: bytes, support_documents: List[SupportDocument],
+                 presummarized: Optional[str] = None, retriever: Optional[Callable[[str, int], List[str]]] = None):
         self.prompt = prompt
         self.template = template
         self.support_documents = support_documents
+        # Already-summarized source material (e.g. a project's document
+        # summaries); lets process_brd skip the reword stage.
+        self.presummarized = presummarized
+        # retriever(query, k) returns the k most relevant chunk summaries, best
+        # first; used to give each prompt only the context it needs.
+        self.retriever = retriever
+
+
+def presummarized_context(prompt: str, summaries: str) -> str:
+    """The reword-stage output for input that is already summarized: the
+    user's prompt followed by the compacted, de-duplicated summaries."""
+    return f"{prompt}\n\n{compact_text(summaries)}"
+
+
+def retrieved_context(brd_input: BRDInput, queries: List[str], k: int = RETRIEVAL_TOP_K) -> str:
+    """The user's prompt followed by each query's top-k chunk summaries.
+
+    Chunks are interleaved by rank and de-duplicated, so when the budgeter
+    drops trailing paragraphs it gives up the least relevant chunks first.
+    """
+    ranked = [brd_input.retriever(query, k) for query in queries]
+    chunks = []
+    for rank in range(k):
+        for results in ranked:
+            if rank < len(results) and results[rank] not in chunks:
+                chunks.append(results[rank])
+    return "\n\n".join([brd_input.prompt] + chunks)
+
 class RewordSummaryAgent:
-    def split_text_into_chunks(self, text: str, max_length: int = 3000) -> List[str]:
-        lines = text.split('\n')
-        chunks = []
-        current_chunk = ""
-        for line in lines:
-            if len(current_chunk) + len(line) < max_length:
-                current_chunk += line + "\n"
-            else:
-                chunks.append(current_chunk.strip())
-                current_chunk = line + "\n"
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        return chunks
+    # Bump when the prompt changes so cached responses are not reused.
+    VERSION = "1"
 
-    def process(self, brd_input: BRDInput) -> str:
-        combined_summaries = []
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.max_concurrency = max(1, max_concurrency)
+        self.failed_chunks = 0
 
-        for doc in brd_input.support_documents:
-            try:
-                text = doc.file_content.decode("utf-8", errors="ignore")
-            except Exception as e:
-                print(f"[Decode Error] {e}")
-                continue
-
-            chunks = self.split_text_into_chunks(text)
-            total_chunks = len(chunks)
+    def split_text_into_chunks(self, text: str, max_tokens: int = CHUNK_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> List[str]:
+        return list(iter_chunks(text, max_tokens=max_tokens, overlap_tokens=overlap_tokens))
 
-            for i, chunk in enumerate(chunks):
-                prompt = f"""
+    def build_chunk_prompt(self, chunk: str, chunk_index: int, total_chunks: int, document_type: str, user_prompt: str) -> str:
+        return f"""
                 You are an expert Business Analyst. 
                 Your task is to carefully analyze the provided content,
-                below is chunk {i+1} out of {total_chunks} from document type: {doc.document_type}.
+                below is chunk {chunk_index+1} out of {total_chunks} from document type: {document_type}.
 
                 {chunk}
 
@@ -69,7 +209,7 @@ class RewordSummaryAgent:
                 This writeup will serve as input notes for the detailed preparation of a Business Requirements Document (BRD). 
                 Ensure that your writeup captures all key points, decisions, and action items relevant to the project or business process.
 
-                {brd_input.prompt}
+                {user_prompt}
 
                 Your task is to generate a JSON object with the following structure:
                 {{
@@ -88,39 +228,72 @@ class RewordSummaryAgent:
                 Remember, your entire response should be a single, valid JSON object.
                 """
 
-                try:
-                    response = groq_client.chat.completions.create(
-                        messages=[{"role": "user", "content": prompt}],
-                        model="llama3-70b-8192"
-                    )
-                    raw_output = response.choices[0].message.content.strip()
+    def summarize_chunk(self, chunk: str, chunk_index: int, total_chunks: int, document_type: str, user_prompt: str) -> Optional[Dict[str, Any]]:
+        """Summarize one chunk; returns None when the chunk could not be summarized."""
+        prompt = self.build_chunk_prompt(chunk, chunk_index, total_chunks, document_type, user_prompt)
+        try:
+            summary = structured_completion(prompt, ChunkSummary, agent="RewordSummaryAgent", agent_version=self.VERSION).dict()
+            summary["chunk_number"] = chunk_index + 1
+            summary["total_chunks"] = total_chunks
+            return summary
+
+        except Exception as e:
+            print(f"[Chunk {chunk_index+1}/{total_chunks}] Unexpected error: {e}")
+            return None
+
+    def process(self, brd_input: BRDInput, progress_callback: Optional[Callable[[int, int], None]] = None,
+                checkpoints: Optional[ChunkCheckpointStore] = None) -> str:
+        # Collect every chunk of every document up front so they can be fanned
+        # out together. Each chunk owns a slot in document order; chunks that
+        # were checkpointed by an earlier run are filled in without an LLM call.
+        results = []
+        tasks = []
+        for doc in brd_input.support_documents:
+            try:
+                text = doc.file_content.decode("utf-8", errors="ignore")
+            except Exception as e:
+                print(f"[Decode Error] {e}")
+                continue
 
-                    try:
-                        # First attempt to parse directly
-                        summary = json.loads(raw_output)
-                    except json.JSONDecodeError:
-                        print(f"[Warning] JSON parsing failed. Trying to clean response.")
-                        start = raw_output.find("{")
-                        end = raw_output.rfind("}")
-                        if start != -1 and end != -1 and end > start:
-                            cleaned = raw_output[start:end+1].strip()
-                            try:
-                                summary = json.loads(cleaned)
-                            except Exception as e2:
-                                print(f"[Final Fail] Cleaned JSON still failed:\n{cleaned}")
-                                print(f"Error: {e2}")
-                                continue
-                        else:
-                            print(f"[Critical] Could not find JSON block in chunk {i+1}/{total_chunks}")
-                            continue
-
-                    summary["chunk_number"] = i + 1
-                    summary["total_chunks"] = total_chunks
-                    combined_summaries.append(summary)
-
-                except Exception as e:
-                    print(f"[Chunk {i+1}/{total_chunks}] Unexpected error: {e}")
-                    continue
+            chunks = self.split_text_into_chunks(text)
+            total_chunks = len(chunks)
+            key = doc.checkpoint_key if checkpoints is not None else None
+            saved = checkpoints.load(key, total_chunks) if key else {}
+            for i, chunk in enumerate(chunks):
+                if i in saved:
+                    results.append(saved[i])
+                else:
+                    tasks.append((len(results), key, (chunk, i, total_chunks, doc.document_type, brd_input.prompt)))
+                    results.append(None)
+
+        total = len(results)
+        done = total - len(tasks)
+
+        def finish(slot: int, key: Optional[str], summary: Optional[Dict[str, Any]]):
+            results[slot] = summary
+            if summary is not None and key:
+                checkpoints.save(key, summary)
+            if progress_callback:
+                progress_callback(done, total)
+
+        if progress_callback:
+            progress_callback(done, total)
+
+        if len(tasks) <= 1 or self.max_concurrency == 1:
+            for slot, key, args in tasks:
+                summary = self.summarize_chunk(*args)
+                done += 1
+                finish(slot, key, summary)
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(tasks))) as executor:
+                futures = {executor.submit(self.summarize_chunk, *args): (slot, key) for slot, key, args in tasks}
+                # Checkpoints are written here, on the calling thread, as chunks finish.
+                for future in as_completed(futures):
+                    done += 1
+                    finish(*futures[future], future.result())
+
+        self.failed_chunks = sum(1 for summary in results if summary is None)
+        combined_summaries = [summary for summary in results if summary is not None]
 
         if not combined_summaries:
             return json.dumps({
@@ -140,7 +313,85 @@ class RewordSummaryAgent:
         })
 
 
+class HierarchicalSummaryAgent:
+    """Map-reduce condensation of summaries that no longer fit the model window.
+
+    The text is cut into token-budgeted batches, each batch is condensed by one
+    LLM call (batches run in parallel), and the condensed output is fed back in
+    until it fits ``target_tokens``.
+    """
+    VERSION = "1"
+
+    def __init__(self, target_tokens: int = SUMMARY_CONTEXT_TOKENS, batch_tokens: int = SUMMARY_BATCH_TOKENS,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, max_rounds: int = 4):
+        self.target_tokens = target_tokens
+        self.batch_tokens = batch_tokens
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_rounds = max_rounds
+
+    def split_sections(self, text: str) -> List[str]:
+        sections = []
+        for paragraph in text.split("\n\n"):
+            if not paragraph.strip():
+                continue
+            if estimate_tokens(paragraph) > self.batch_tokens:
+                sections.extend(iter_chunks(paragraph, max_tokens=self.batch_tokens))
+            else:
+                sections.append(paragraph)
+        return sections
+
+    def build_prompt(self, batch_text: str, target_tokens: int) -> str:
+        return f"""
+        You are an expert Business Analyst. The following notes were extracted from several project documents
+        and will be used to prepare a Business Requirements Document (BRD).
+
+        {batch_text}
+
+        Condense these notes into a single writeup of at most {target_tokens} tokens.
+        Keep every requirement, decision, stakeholder, constraint, date, figure and action item;
+        merge duplicates and drop filler. Keep the source document names where they are given.
+        Respond with the writeup only, without any introduction.
+        """
+
+    def reduce_batch(self, batch: List[str], target_tokens: int) -> str:
+        prompt = self.build_prompt("\n\n".join(batch), target_tokens)
+        return chat_completion(prompt, agent="HierarchicalSummaryAgent", agent_version=self.VERSION).strip()
+
+    def process(self, text: str) -> str:
+        for round_number in range(1, self.max_rounds + 1):
+            if estimate_tokens(text) <= self.target_tokens:
+                return text
+
+            batches = batch_by_tokens(self.split_sections(text), self.batch_tokens)
+            # Share the target between batches so one more round is usually enough.
+            per_batch_tokens = max(200, self.target_tokens // len(batches))
+            logger.info(f"Hierarchical summary round {round_number}: "
+                        f"{estimate_tokens(text)} tokens in {len(batches)} batches")
+
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+                reduced = list(executor.map(lambda batch: self.reduce_batch(batch, per_batch_tokens), batches))
+            text = "\n\n".join(part for part in reduced if part)
+        return text
+
+
+def fit_summary_to_context(combined_summary: str, target_tokens: int = SUMMARY_CONTEXT_TOKENS) -> str:
+    """Return combined_summary unchanged if it fits, otherwise condense it."""
+    if estimate_tokens(combined_summary) <= target_tokens:
+        return combined_summary
+    return HierarchicalSummaryAgent(target_tokens=target_tokens).process(combined_summary)
+
+
 class BRDCompletionAgent:
+    VERSION = "1"
+    # One retrieval query per aspect the prompt asks about.
+    RETRIEVAL_QUERIES = [
+        "project scope", "stakeholder requirements", "technical specifications", "timeline and milestones",
+        "budget constraints and requirements", "risks", "success criteria and metrics",
+    ]
+
+    def __init__(self, prompt_token_budget: int = BRD_PROMPT_TOKEN_BUDGET):
+        self.prompt_token_budget = prompt_token_budget
+
     def ensure_string(self, data: Union[str, bytes]) -> str:
         if isinstance(data, bytes):
             try:
@@ -154,9 +405,20 @@ class BRDCompletionAgent:
                 return data.decode('latin-1', errors='replace')
         return data
 
-    def process(self, brd_input: BRDInput, reworded_summary: str) -> Dict[str, Any]:
-        template = self.ensure_string(brd_input.template)
-        prompt=f"""As an experienced project manager, analyze the following BRD summary and determine if additional details are needed:
+    def build_prompt(self, brd_input: BRDInput, reworded_summary: str) -> str:
+        summary = reworded_summary
+        if brd_input.retriever is not None:
+            summary = retrieved_context(brd_input, self.RETRIEVAL_QUERIES)
+        sections = [
+            PromptSection("summary", summary, priority=0),
+            PromptSection("template", self.ensure_string(brd_input.template), priority=1),
+        ]
+        overhead = estimate_tokens(self.render_prompt("", ""))
+        fitted = PromptBudgeter(self.prompt_token_budget).fit(sections, overhead_tokens=overhead)
+        return self.render_prompt(fitted["summary"], fitted["template"])
+
+    def render_prompt(self, reworded_summary: str, template: str) -> str:
+        return f"""As an experienced project manager, analyze the following BRD summary and determine if additional details are needed:
 
         {reworded_summary}
 
@@ -190,16 +452,20 @@ class BRDCompletionAgent:
         6. Do not include any explanations or additional text outside the JSON structure.
         7. Verify that your response can be parsed as JSON before submitting.
         """
-        response = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama3-70b-8192",
-        )
+
+    def process(self, brd_input: BRDInput, reworded_summary: str) -> Dict[str, Any]:
+        prompt = self.build_prompt(brd_input, reworded_summary)
         try:
-            return json.loads(response.choices[0].message.content)
-        except json.JSONDecodeError:
+            return structured_completion(prompt, CompletionAnalysis, agent="BRDCompletionAgent", agent_version=self.VERSION).dict()
+        except (ValueError, ValidationError):
             return {"status": "error", "details": ["Failed to parse response"]}
 
 class BRDCreationAgent:
+    VERSION = "1"
+
+    def __init__(self, prompt_token_budget: int = BRD_PROMPT_TOKEN_BUDGET):
+        self.prompt_token_budget = prompt_token_budget
+
     def ensure_string(self, data: Union[str, bytes]) -> str:
         if isinstance(data, bytes):
             try:
@@ -213,16 +479,34 @@ class BRDCreationAgent:
                 return data.decode('latin-1', errors='replace')
         return data
 
-    def process(self, brd_input: BRDInput, reworded_summary: str, completion_suggestions: Dict[str, Any]) -> str:
-        template = self.ensure_string(brd_input.template)
-        prompt = f"""
+    def retrieval_queries(self, brd_input: BRDInput, completion_suggestions: Dict[str, Any]) -> List[str]:
+        """The prompt, each template section and each completion question."""
+        sections = parse_template_sections(self.ensure_string(brd_input.template))
+        return ([brd_input.prompt] + [f"{section.heading}\n{section.body}" for section in sections]
+                + [str(detail) for detail in completion_suggestions.get("details", [])])
+
+    def build_prompt(self, brd_input: BRDInput, reworded_summary: str, completion_suggestions: Dict[str, Any]) -> str:
+        if brd_input.retriever is not None:
+            reworded_summary = retrieved_context(brd_input, self.retrieval_queries(brd_input, completion_suggestions))
+        sections = [
+            # The bulk of the prompt, and the first thing to give up space.
+            PromptSection("summary", reworded_summary, priority=0),
+            PromptSection("details", json.dumps(completion_suggestions), priority=1, compactable=False),
+            PromptSection("template", self.ensure_string(brd_input.template), priority=2),
+        ]
+        overhead = estimate_tokens(self.render_prompt("", "", ""))
+        fitted = PromptBudgeter(self.prompt_token_budget).fit(sections, overhead_tokens=overhead)
+        return self.render_prompt(fitted["summary"], fitted["details"], fitted["template"])
+
+    def render_prompt(self, reworded_summary: str, details: str, template: str) -> str:
+        return f"""
         As a senior business analyst, create a comprehensive Business Requirements Document (BRD) based on the following information:
 
         Initial Summary:
         {reworded_summary}
 
         Additional Details:
-        {json.dumps(completion_suggestions, indent=2)}
+        {details}
 
         Use the following template to structure your BRD:
 
@@ -241,15 +525,126 @@ class BRDCreationAgent:
 
         Create a detailed and professional BRD that could be presented to senior management and technical teams.
         """
-        response = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama3-70b-8192",
-        )
-        return response.choices[0].message.content
+
+    def process(self, brd_input: BRDInput, reworded_summary: str, completion_suggestions: Dict[str, Any],
+                cancel_event: Optional[threading.Event] = None) -> str:
+        prompt = self.build_prompt(brd_input, reworded_summary, completion_suggestions)
+        return chat_completion(prompt, agent="BRDCreationAgent", agent_version=self.VERSION, cancel_event=cancel_event)
+
+    def stream(self, brd_input: BRDInput, reworded_summary: str, completion_suggestions: Dict[str, Any]) -> Iterator[str]:
+        prompt = self.build_prompt(brd_input, reworded_summary, completion_suggestions)
+        return stream_chat_completion(prompt, agent="BRDCreationAgent", agent_version=self.VERSION)
+
+class TemplateSection:
+    def __init__(self, heading: str, body: str):
+        self.heading = heading
+        self.body = body
+
+
+def parse_template_sections(template: str) -> List[TemplateSection]:
+    """Split a BRD template into its headed sections, in template order.
+
+    Text before the first heading is not a section of its own.
+    """
+    sections = []
+    for line in template.splitlines():
+        if is_heading(line):
+            sections.append(TemplateSection(line.strip(), ""))
+        elif sections:
+            sections[-1].body += line + "\n"
+    for section in sections:
+        section.body = section.body.strip()
+    return sections
+
+
+class SectionedBRDCreationAgent(BRDCreationAgent):
+    """Writes each template section with its own, concurrent LLM call.
+
+    Every call sees the same details and the full outline, so sections stay
+    consistent. With a retriever on the input, each section gets its top-k
+    relevant chunk summaries, otherwise the full summary; either is fitted to
+    the prompt budget. The result is stitched together in template order.
+    Templates with fewer than two headings fall back to single-call
+    generation.
+    """
+
+    def __init__(self, prompt_token_budget: int = BRD_PROMPT_TOKEN_BUDGET, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        super().__init__(prompt_token_budget)
+        self.max_concurrency = max(1, max_concurrency)
+
+    def render_section_prompt(self, section: TemplateSection, outline: str, reworded_summary: str, details: str) -> str:
+        return f"""
+        As a senior business analyst, you are writing one section of a Business Requirements Document (BRD).
+        Other analysts are writing the remaining sections at the same time, so write only the section below.
+
+        Full BRD outline:
+        {outline}
+
+        Section to write: {section.heading}
+        Template guidance for this section:
+        {section.body or "(none)"}
+
+        Initial Summary:
+        {reworded_summary}
+
+        Additional Details:
+        {details}
+
+        Ensure that you:
+        - Cover everything in the initial summary and additional details that belongs in this section, and nothing that belongs elsewhere in the outline.
+        - Provide clear, actionable requirements using industry-standard terminology and formatting.
+        - Use placeholders for any information that may need to be filled in later.
+        - Do not repeat the section heading and do not add any introductory or closing text.
+        """
+
+    def process(self, brd_input: BRDInput, reworded_summary: str, completion_suggestions: Dict[str, Any],
+                cancel_event: Optional[threading.Event] = None) -> str:
+        sections = parse_template_sections(self.ensure_string(brd_input.template))
+        if len(sections) < 2:
+            return super().process(brd_input, reworded_summary, completion_suggestions, cancel_event=cancel_event)
+
+        outline = "\n".join(section.heading for section in sections)
+        largest = max(sections, key=lambda section: estimate_tokens(section.body))
+        details = json.dumps(completion_suggestions)
+
+        def fit(section: TemplateSection, summary: str) -> Dict[str, str]:
+            overhead = estimate_tokens(self.render_section_prompt(section, outline, "", ""))
+            return PromptBudgeter(self.prompt_token_budget).fit([
+                PromptSection("summary", summary, priority=0),
+                PromptSection("details", details, priority=1, compactable=False),
+            ], overhead_tokens=overhead)
+
+        # Without a retriever every section shares the full summary, fitted
+        # once for the section with the longest guidance.
+        shared = fit(largest, reworded_summary) if brd_input.retriever is None else None
+
+        def write_section(section: TemplateSection) -> str:
+            if shared is not None:
+                fitted = shared
+            else:
+                fitted = fit(section, retrieved_context(brd_input, [f"{section.heading}\n{section.body}"]))
+            prompt = self.render_section_prompt(section, outline, fitted["summary"], fitted["details"])
+            return chat_completion(prompt, agent="SectionedBRDCreationAgent", agent_version=self.VERSION,
+                                   cancel_event=cancel_event).strip()
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(sections))) as executor:
+            bodies = list(executor.map(write_section, sections))
+
+        return "\n\n".join(f"{section.heading}\n\n{body}" for section, body in zip(sections, bodies))
+
+
+def get_creation_agent(mode: str = BRD_GENERATION_MODE) -> BRDCreationAgent:
+    if mode == "sectioned":
+        return SectionedBRDCreationAgent()
+    if mode == "single":
+        return BRDCreationAgent()
+    raise ValueError(f"Unknown BRD generation mode: {mode}")
 
 class BRDReviewAgent:
-    def process(self, brd_document: str) -> str:
-        prompt = f"""
+    VERSION = "1"
+
+    def build_prompt(self, brd_document: str) -> str:
+        return f"""
         As a senior project manager and business analyst, review the following Business Requirements Document (BRD) and provide comprehensive feedback:
 
         {brd_document}
@@ -274,31 +669,68 @@ class BRDReviewAgent:
 
         Your review should be thorough and constructive, aimed at improving the overall quality and effectiveness of the BRD.
         """
-        response = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama3-70b-8192",
-        )
-        return response.choices[0].message.content
+
+    def process(self, brd_document: str) -> str:
+        return chat_completion(self.build_prompt(brd_document), agent="BRDReviewAgent", agent_version=self.VERSION)
+
+    def stream(self, brd_document: str) -> Iterator[str]:
+        return stream_chat_completion(self.build_prompt(brd_document), agent="BRDReviewAgent", agent_version=self.VERSION)
 
 # ------------ Logic Wrappers -------------
 
-def process_brd(brd_input: BRDInput) -> Dict[str, Any]:
+# What BRDCompletionAgent returns when nothing is missing; a draft built from it
+# can be started before the completion check has answered.
+NO_COMPLETION_NEEDED = {"status": "not_need", "details": []}
+
+
+def process_brd(brd_input: BRDInput, mode: str = BRD_GENERATION_MODE) -> Dict[str, Any]:
     reword_agent = RewordSummaryAgent()
     completion_agent = BRDCompletionAgent()
-    creation_agent = BRDCreationAgent()
+    creation_agent = get_creation_agent(mode)
 
-    reworded_summary = reword_agent.process(brd_input)
-    completion_suggestions = completion_agent.process(brd_input, reworded_summary)
-    brd_draft = creation_agent.process(brd_input, reworded_summary, completion_suggestions)
+    def reword(deps: Dict[str, Any], run: PipelineRun) -> str:
+        if brd_input.presummarized is not None and not brd_input.support_documents:
+            # Nothing to reword; go straight to completion/creation.
+            return presummarized_context(brd_input.prompt, brd_input.presummarized)
+        return reword_agent.process(brd_input)
+
+    def create_speculative_draft(deps: Dict[str, Any], run: PipelineRun) -> Optional[str]:
+        try:
+            return creation_agent.process(
+                brd_input, deps["reword"], NO_COMPLETION_NEEDED, cancel_event=run.cancel_event("speculative_draft")
+            )
+        except Exception as e:
+            logger.info(f"Speculative draft abandoned: {e!r}")
+            return None
+
+    def create_draft(deps: Dict[str, Any], run: PipelineRun) -> str:
+        # Keep the speculative draft only if the completion check agrees that
+        # nothing is missing; otherwise abandon it and write the real one.
+        if deps["completion"] == NO_COMPLETION_NEEDED:
+            draft = run.wait("speculative_draft")
+            if draft is not None:
+                return draft
+        else:
+            run.cancel("speculative_draft")
+        return creation_agent.process(brd_input, deps["reword"], deps["completion"])
+
+    run = PipelineRunner().run([
+        Stage("reword", reword),
+        Stage("completion", lambda deps, run: completion_agent.process(brd_input, deps["reword"]), depends_on=["reword"]),
+        Stage("speculative_draft", create_speculative_draft, depends_on=["reword"]),
+        Stage("draft", create_draft, depends_on=["reword", "completion"]),
+    ])
 
     return {
-        "reworded_summary": reworded_summary,
-        "completion_suggestions": completion_suggestions,
-        "brd_draft": brd_draft
+        "reworded_summary": run.results["reword"],
+        "completion_suggestions": run.results["completion"],
+        "brd_draft": run.results["draft"],
+        "stage_timings": run.timings
     }
 
-def generate_final_brd(brd_input: BRDInput, completion_answers: Dict[str, str], reworded_summary: str) -> Dict[str, Any]:
-    creation_agent = BRDCreationAgent()
+def generate_final_brd(brd_input: BRDInput, completion_answers: Dict[str, str], reworded_summary: str,
+                       mode: str = BRD_GENERATION_MODE) -> Dict[str, Any]:
+    creation_agent = get_creation_agent(mode)
     review_agent = BRDReviewAgent()
 
     completion_suggestions = {
@@ -314,6 +746,28 @@ def generate_final_brd(brd_input: BRDInput, completion_answers: Dict[str, str],
         "review_feedback": review_feedback
     }
 
+def stream_final_brd(brd_input: BRDInput, completion_answers: Dict[str, str], reworded_summary: str) -> Iterator[Tuple[str, str]]:
+    """Streaming variant of generate_final_brd.
+
+    Yields ``(event, text)`` pairs: ``brd_document`` tokens while the draft is
+    written, then ``review_feedback`` tokens for the review of that draft.
+    """
+    creation_agent = BRDCreationAgent()
+    review_agent = BRDReviewAgent()
+
+    completion_suggestions = {
+        "status": "need",
+        "details": list(completion_answers.keys())
+    }
+
+    parts = []
+    for token in creation_agent.stream(brd_input, reworded_summary, completion_suggestions):
+        parts.append(token)
+        yield "brd_document", token
+
+    for token in review_agent.stream("".join(parts)):
+        yield "review_feedback", token
+
 # ------------ DOCX Export -------------
 
 def create_brd_word_document(brd_content: str, output_path: str):
@@ -326,15 +780,24 @@ def create_brd_word_document(brd_content: str, output_path: str):
     doc.save(output_path)
 
 
-def process_single_document(file_content: bytes, description: str, document_type: str, session_folder: str) -> Dict[str, Any]:
+def process_single_document(file_content: bytes, description: str, document_type: str, session_folder: str,
+                            progress_callback: Optional[Callable[[int, int], None]] = None,
+                            checkpoints: Optional[ChunkCheckpointStore] = None,
+                            checkpoint_key: Optional[str] = None) -> Dict[str, Any]:
     reword_agent = RewordSummaryAgent()
-    support_doc = SupportDocument(file_content, description, document_type)
+    support_doc = SupportDocument(file_content, description, document_type, checkpoint_key=checkpoint_key)
     print("support_doc", support_doc)
     print("file_content", file_content)
     brd_input = BRDInput(prompt=f"Summarize the following document: description as{description}", template=b"", support_documents=[support_doc])
 
     try:
-        reworded_summary = reword_agent.process(brd_input)
+        reworded_summary = reword_agent.process(brd_input, progress_callback=progress_callback, checkpoints=checkpoints)
+        if reword_agent.failed_chunks:
+            return {
+                "summary": {"title": "Error", "description": f"{reword_agent.failed_chunks} chunk(s) could not be summarized"},
+                "path": "",
+                "failed_chunks": reword_agent.failed_chunks
+            }
         logger.info("Reworded summary processed")
 
         try:
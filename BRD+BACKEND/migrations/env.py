@@ -0,0 +1,38 @@
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine
+from app.database import Base, DATABASE_URL, engine
+from app import models  # noqa: F401  (registers the tables on Base.metadata)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+# sqlalchemy.url in the Alembic config (e.g. set by tests) overrides DATABASE_URL.
+url = config.get_main_option("sqlalchemy.url") or DATABASE_URL
+
+
+def run_migrations_offline():
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connectable = engine if url == DATABASE_URL else create_engine(url)
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
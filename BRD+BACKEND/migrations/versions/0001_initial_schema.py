@@ -0,0 +1,75 @@
+"""Baseline schema, as Base.metadata.create_all created it before migrations
+
+Databases created by the app before migrations existed are at exactly this
+revision: mark them with `alembic stamp 0001`, then `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        sa.Column("name", sa.String()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "groups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_groups_id", "groups", ["id"])
+
+    op.create_table(
+        "group_members",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id")),
+    )
+
+    op.create_table(
+        "projects",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("description", sa.Text()),
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id")),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_projects_id", "projects", ["id"])
+    op.create_index("ix_projects_name", "projects", ["name"])
+
+    op.create_table(
+        "documents",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("filename", sa.String()),
+        sa.Column("path", sa.String()),
+        sa.Column("description", sa.String()),
+        sa.Column("summary_title", sa.String()),
+        sa.Column("summary_description", sa.Text()),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id")),
+        sa.Column("uploaded_by", sa.Integer(), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_documents_id", "documents", ["id"])
+
+
+def downgrade():
+    op.drop_table("documents")
+    op.drop_table("projects")
+    op.drop_table("group_members")
+    op.drop_table("groups")
+    op.drop_table("users")
@@ -0,0 +1,76 @@
+"""Upload job, summary, dedup and checkpoint tables; documents.content_hash
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("documents", sa.Column("content_hash", sa.String(64)))
+    op.create_index("ix_documents_content_hash", "documents", ["content_hash"])
+
+    op.create_table(
+        "stored_blobs",
+        sa.Column("sha256", sa.String(64), primary_key=True),
+        sa.Column("path", sa.String()),
+        sa.Column("size", sa.Integer()),
+        sa.Column("ref_count", sa.Integer()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "chunk_checkpoints",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("document_hash", sa.String(64)),
+        sa.Column("chunk_index", sa.Integer()),
+        sa.Column("total_chunks", sa.Integer()),
+        sa.Column("title", sa.String()),
+        sa.Column("description", sa.Text()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.UniqueConstraint("document_hash", "total_chunks", "chunk_index"),
+    )
+    op.create_index("ix_chunk_checkpoints_id", "chunk_checkpoints", ["id"])
+    op.create_index("ix_chunk_checkpoints_document_hash", "chunk_checkpoints", ["document_hash"])
+
+    op.create_table(
+        "project_summaries",
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), primary_key=True),
+        sa.Column("combined_summary", sa.Text()),
+        sa.Column("document_count", sa.Integer()),
+        sa.Column("version", sa.Integer()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "document_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("document_id", sa.Integer(), sa.ForeignKey("documents.id")),
+        sa.Column("content_type", sa.String()),
+        sa.Column("status", sa.String()),
+        sa.Column("total_chunks", sa.Integer()),
+        sa.Column("processed_chunks", sa.Integer()),
+        sa.Column("error", sa.Text()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_document_jobs_id", "document_jobs", ["id"])
+    op.create_index("ix_document_jobs_status", "document_jobs", ["status"])
+
+
+def downgrade():
+    op.drop_table("document_jobs")
+    op.drop_table("project_summaries")
+    op.drop_table("chunk_checkpoints")
+    op.drop_table("stored_blobs")
+    op.drop_index("ix_documents_content_hash", table_name="documents")
+    with op.batch_alter_table("documents") as batch:
+        batch.drop_column("content_hash")
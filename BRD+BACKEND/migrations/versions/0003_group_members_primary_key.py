@@ -0,0 +1,44 @@
+"""Composite primary key and group_id index on group_members
+
+The baseline table had no key, so repeated joins could store the same
+membership twice; rows are de-duplicated (and rows with NULLs dropped)
+before the key is added.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "CREATE TABLE group_members_dedup AS "
+        "SELECT DISTINCT user_id, group_id FROM group_members "
+        "WHERE user_id IS NOT NULL AND group_id IS NOT NULL"
+    )
+    op.execute("DELETE FROM group_members")
+    op.execute("INSERT INTO group_members (user_id, group_id) SELECT user_id, group_id FROM group_members_dedup")
+    op.drop_table("group_members_dedup")
+
+    # batch mode so SQLite (which can't ALTER in a primary key) recreates the table.
+    with op.batch_alter_table("group_members") as batch:
+        batch.alter_column("user_id", existing_type=sa.Integer(), nullable=False)
+        batch.alter_column("group_id", existing_type=sa.Integer(), nullable=False)
+        batch.create_primary_key("pk_group_members", ["user_id", "group_id"])
+    op.create_index("ix_group_members_group_id", "group_members", ["group_id"])
+
+
+def downgrade():
+    op.drop_index("ix_group_members_group_id", table_name="group_members")
+    with op.batch_alter_table("group_members") as batch:
+        batch.drop_constraint("pk_group_members", type_="primary")
+        batch.alter_column("user_id", existing_type=sa.Integer(), nullable=True)
+        batch.alter_column("group_id", existing_type=sa.Integer(), nullable=True)
@@ -0,0 +1,32 @@
+"""Index foreign keys used by listings and membership checks
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_groups_created_by", "groups", "created_by"),
+    ("ix_projects_group_id", "projects", "group_id"),
+    ("ix_projects_created_by", "projects", "created_by"),
+    ("ix_documents_project_id", "documents", "project_id"),
+    ("ix_documents_uploaded_by", "documents", "uploaded_by"),
+    ("ix_document_jobs_document_id", "document_jobs", "document_id"),
+]
+
+
+def upgrade():
+    for name, table, column in INDEXES:
+        op.create_index(name, table, [column])
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
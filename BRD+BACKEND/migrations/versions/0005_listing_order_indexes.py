@@ -0,0 +1,30 @@
+"""Composite indexes for keyset-paginated listings
+
+(project_id, id) and (group_id, id) serve both the foreign-key lookups and
+id-ordered pages, so they replace the single-column indexes from 0004.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_documents_project_id_id", "documents", ["project_id", "id"])
+    op.drop_index("ix_documents_project_id", table_name="documents")
+    op.create_index("ix_projects_group_id_id", "projects", ["group_id", "id"])
+    op.drop_index("ix_projects_group_id", table_name="projects")
+
+
+def downgrade():
+    op.create_index("ix_projects_group_id", "projects", ["group_id"])
+    op.drop_index("ix_projects_group_id_id", table_name="projects")
+    op.create_index("ix_documents_project_id", "documents", ["project_id"])
+    op.drop_index("ix_documents_project_id_id", table_name="documents")
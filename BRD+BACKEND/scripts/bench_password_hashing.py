@@ -0,0 +1,53 @@
+"""Measure login throughput (bcrypt verifications per second) per core.
+
+Run from BRD+BACKEND:
+
+    python -m scripts.bench_password_hashing --rounds 10 11 12 13 --seconds 5
+
+For each cost factor it reports the single-thread rate (logins/sec on one
+core) and the rate with PASSWORD_HASH_WORKERS threads, which shows how well
+the verify pool scales. Pick the highest BCRYPT_ROUNDS whose per-core rate
+still covers peak login traffic divided by the cores available.
+"""
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from app.services.passwords import make_password_context, PASSWORD_HASH_WORKERS, BCRYPT_ROUNDS
+
+
+def logins_per_second(context, hashed_password: str, workers: int, seconds: float) -> float:
+    deadline = time.perf_counter() + seconds
+
+    def worker() -> int:
+        count = 0
+        while time.perf_counter() < deadline:
+            context.verify("correct horse battery staple", hashed_password)
+            count += 1
+        return count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        total = sum(executor.map(lambda _: worker(), range(workers)))
+    return total / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, nargs="+", default=[BCRYPT_ROUNDS])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=PASSWORD_HASH_WORKERS)
+    args = parser.parse_args()
+
+    print(f"cores={os.cpu_count()} workers={args.workers}")
+    print(f"{'rounds':>6} {'ms/login':>9} {'logins/s/core':>14} {'logins/s pool':>14} {'scaling':>8}")
+    for rounds in args.rounds:
+        context = make_password_context(rounds)
+        hashed_password = context.hash("correct horse battery staple")
+        single = logins_per_second(context, hashed_password, 1, args.seconds)
+        pooled = logins_per_second(context, hashed_password, args.workers, args.seconds)
+        print(f"{rounds:>6} {1000 / single:>9.1f} {single:>14.1f} {pooled:>14.1f} {pooled / single:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import os
+import shutil
+import tempfile
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Set before any app module is imported: the Groq client, the engine and the
+# rate limiter's SQLite file are created at import time. No test makes a real
+# API call, and nothing is written to the working directory.
+STATE_DIR = tempfile.mkdtemp(prefix="brd-tests-")
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(STATE_DIR, "llm_cache.sqlite3"))
+os.environ.setdefault("RATE_LIMIT_PATH", os.path.join(STATE_DIR, "rate_limits.sqlite3"))
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(STATE_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db(tmp_path):
+    from app.database import Base
+    from app import models  # noqa: F401
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
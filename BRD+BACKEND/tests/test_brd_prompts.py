@@ -0,0 +1,57 @@
+from app import v2_logic
+from app.utils.tokens import estimate_tokens
+from app.v2_logic import BRDCompletionAgent, BRDCreationAgent, BRDInput, SectionedBRDCreationAgent
+
+TEMPLATE = b"1. Scope\nWhat is in scope.\n2. Budget\nCosts and funding."
+NEEDS_DETAILS = {"status": "need", "details": ["Who approves the budget?"]}
+
+
+def retriever(query, k):
+    # k chunks of about 90 tokens per query, best first.
+    return [f"{query.splitlines()[0]} chunk {rank}: " + "requirement text " * 20 for rank in range(k)]
+
+
+def brd_input(template=TEMPLATE):
+    return BRDInput(prompt="Build a claims portal", template=template, support_documents=[], retriever=retriever)
+
+
+def test_sectioned_retrieved_context_is_fitted_to_the_budget(monkeypatch):
+    prompts = []
+    monkeypatch.setattr(v2_logic, "chat_completion", lambda prompt, **kwargs: prompts.append(prompt) or "body")
+
+    SectionedBRDCreationAgent(prompt_token_budget=600).process(brd_input(), "full summary", NEEDS_DETAILS)
+
+    scope, budget = sorted(prompts, key=lambda prompt: "Section to write: 2. Budget" in prompt)
+    for prompt in (scope, budget):
+        assert estimate_tokens(prompt) <= 600
+        assert "full summary" not in prompt
+        assert "Build a claims portal" in prompt
+    # The least relevant chunks are the ones dropped.
+    assert "1. Scope chunk 0:" in scope and "1. Scope chunk 5:" not in scope
+    assert "2. Budget chunk 0:" in budget and "1. Scope chunk" not in budget
+
+
+def test_single_call_prompt_uses_retrieved_context():
+    prompt = BRDCreationAgent(prompt_token_budget=800).build_prompt(brd_input(), "full summary", NEEDS_DETAILS)
+
+    assert estimate_tokens(prompt) <= 800
+    assert "full summary" not in prompt
+    # Every query's best chunk survives before any query's second best.
+    for query in ("Build a claims portal", "1. Scope", "2. Budget", "Who approves the budget?"):
+        assert f"{query} chunk 0:" in prompt
+    assert "chunk 1:" not in prompt
+
+
+def test_completion_prompt_uses_retrieved_context():
+    prompt = BRDCompletionAgent(prompt_token_budget=1000).build_prompt(brd_input(), "full summary")
+
+    assert estimate_tokens(prompt) <= 1000
+    assert "full summary" not in prompt
+    assert "project scope chunk 0:" in prompt
+
+
+def test_without_retriever_prompts_use_the_summary():
+    plain = BRDInput(prompt="p", template=TEMPLATE, support_documents=[])
+
+    assert "full summary" in BRDCompletionAgent().build_prompt(plain, "full summary")
+    assert "full summary" in BRDCreationAgent().build_prompt(plain, "full summary", NEEDS_DETAILS)
@@ -0,0 +1,25 @@
+import pytest
+from app.utils.chunking import iter_chunks
+from app.utils.tokens import estimate_tokens
+
+
+@pytest.mark.parametrize("text", [
+    "x" * 50000,
+    "数据" * 20000,
+    "aGVsbG8gd29ybGQ=" * 3000,
+    "intro sentence. " + "y" * 5000 + " closing words here.",
+])
+def test_chunks_never_exceed_budget(text):
+    chunks = list(iter_chunks(text, 100))
+
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    assert "".join("".join(chunks).split()) == "".join(text.split())
+
+
+def test_overlap_repeats_trailing_lines():
+    text = "\n".join(f"line number {i} of the document" for i in range(40))
+
+    chunks = list(iter_chunks(text, 60, overlap_tokens=15))
+
+    assert len(chunks) > 1
+    assert chunks[1].splitlines()[0] in chunks[0]
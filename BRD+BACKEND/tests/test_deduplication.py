@@ -0,0 +1,39 @@
+from sqlalchemy.orm import sessionmaker
+from app import models
+from app.services import deduplication
+from app.services.deduplication import acquire_blob, release_blob
+
+
+def test_acquire_counts_references(db):
+    acquire_blob(db, "abc", "uploads/a.pdf", 10)
+    db.commit()
+    blob = acquire_blob(db, "abc", "uploads/b.pdf", 10)
+    db.commit()
+
+    assert (blob.path, blob.ref_count) == ("uploads/a.pdf", 2)
+    assert release_blob(db, "abc") is None
+    assert release_blob(db, "abc") == "uploads/a.pdf"
+
+
+def test_concurrent_first_upload_reuses_the_inserted_blob(db, monkeypatch):
+    select_locked = deduplication._select_locked
+    misses = []
+
+    def racing_select(session, sha256):
+        if not misses:
+            # Our lookup misses, then another upload inserts the row.
+            misses.append(sha256)
+            other = sessionmaker(bind=db.get_bind())()
+            acquire_blob(other, sha256, "uploads/first.pdf", 10)
+            other.commit()
+            other.close()
+            return None
+        return select_locked(session, sha256)
+
+    monkeypatch.setattr(deduplication, "_select_locked", racing_select)
+
+    blob = acquire_blob(db, "abc", "uploads/second.pdf", 10)
+    db.commit()
+
+    assert (blob.path, blob.ref_count) == ("uploads/first.pdf", 2)
+    assert db.query(models.StoredBlob).count() == 1
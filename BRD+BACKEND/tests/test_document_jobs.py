@@ -0,0 +1,51 @@
+import threading
+from datetime import datetime, timedelta
+from app import models
+from app.services.document_jobs import DOCUMENT_JOB_STALE_SECONDS, DocumentJobQueue, claim_job
+
+
+def add_job(db, status, updated_at=None):
+    job = models.DocumentJob(status=status, updated_at=updated_at or datetime.utcnow())
+    db.add(job)
+    db.commit()
+    return job.id
+
+
+def test_queued_job_is_claimed_once(db):
+    job_id = add_job(db, "queued")
+
+    assert claim_job(db, job_id)
+    assert not claim_job(db, job_id)
+    assert db.get(models.DocumentJob, job_id).status == "running"
+
+
+def test_running_job_is_reclaimed_only_when_stale(db):
+    fresh = add_job(db, "running")
+    stale = add_job(db, "running", datetime.utcnow() - timedelta(seconds=DOCUMENT_JOB_STALE_SECONDS + 1))
+
+    assert not claim_job(db, fresh)
+    assert claim_job(db, stale)
+
+
+def test_finished_jobs_are_not_claimed(db):
+    assert not claim_job(db, add_job(db, "completed"))
+    assert not claim_job(db, add_job(db, "failed"))
+
+
+def test_job_waiting_in_the_executor_is_not_submitted_again():
+    queue = DocumentJobQueue(max_workers=1)
+    release = threading.Event()
+    runs = []
+
+    def run(job_id):
+        runs.append(job_id)
+        release.wait()
+
+    queue.run = run
+    queue.enqueue(1)
+    queue.enqueue(2)
+    queue.enqueue(2)  # e.g. a recovery sweep while job 2 still waits
+    release.set()
+    queue.executor.shutdown(wait=True)
+
+    assert runs == [1, 2]
@@ -0,0 +1,44 @@
+import pytest
+from app import v2_logic
+from app.services.llm_cache import LLMResponseCache
+from app.v2_logic import ChunkSummary, structured_completion
+
+
+class FakeGateway:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def complete(self, messages, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = LLMResponseCache(path=str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(v2_logic, "llm_cache", cache)
+    return cache
+
+
+def test_invalid_structured_response_is_not_cached(cache, monkeypatch):
+    gateway = FakeGateway(['{"title": "only a title"}', '{"title": "t", "description": "d"}'])
+    monkeypatch.setattr(v2_logic, "llm_gateway", gateway)
+
+    with pytest.raises(ValueError):
+        structured_completion("prompt", ChunkSummary, agent="Test", agent_version="1")
+    result = structured_completion("prompt", ChunkSummary, agent="Test", agent_version="1")
+
+    assert result == ChunkSummary(title="t", description="d")
+    assert gateway.calls == 2
+
+
+def test_valid_structured_response_is_served_from_cache(cache, monkeypatch):
+    gateway = FakeGateway(['{"title": "t", "description": "d"}'])
+    monkeypatch.setattr(v2_logic, "llm_gateway", gateway)
+
+    first = structured_completion("prompt", ChunkSummary, agent="Test", agent_version="1")
+    second = structured_completion("prompt", ChunkSummary, agent="Test", agent_version="1")
+
+    assert first == second
+    assert gateway.calls == 1
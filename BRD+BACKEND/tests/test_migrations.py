@@ -0,0 +1,43 @@
+import os
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+from app.database import Base
+from app import models  # noqa: F401
+
+
+def alembic_config(url):
+    config = Config(os.path.join(os.path.dirname(__file__), "..", "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def test_upgrade_head_matches_models(tmp_path):
+    url = f"sqlite:///{tmp_path / 'fresh.db'}"
+    command.upgrade(alembic_config(url), "head")
+
+    with create_engine(url).connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+
+
+def test_baseline_database_upgrades_with_duplicate_memberships(tmp_path):
+    url = f"sqlite:///{tmp_path / 'baseline.db'}"
+    config = alembic_config(url)
+    command.upgrade(config, "0001")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email) VALUES (1, 'a@example.com')"))
+        connection.execute(text("INSERT INTO groups (id, name, created_by) VALUES (1, 'g', 1)"))
+        connection.execute(text("INSERT INTO group_members VALUES (1, 1), (1, 1), (NULL, 1)"))
+        connection.execute(text("INSERT INTO documents (id, filename, project_id) VALUES (1, 'a.pdf', NULL)"))
+
+    command.upgrade(config, "head")
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT user_id, group_id FROM group_members")).all() == [(1, 1)]
+        assert connection.execute(text("SELECT content_hash FROM documents")).all() == [(None,)]
+        assert inspect(connection).get_pk_constraint("group_members")["constrained_columns"] == ["user_id", "group_id"]
+
+    command.downgrade(config, "base")
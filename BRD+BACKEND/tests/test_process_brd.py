@@ -0,0 +1,60 @@
+from app import v2_logic
+from app.v2_logic import BRDInput, NO_COMPLETION_NEEDED, process_brd
+
+NEEDS_DETAILS = {"status": "need", "details": ["Who approves the budget?"]}
+
+
+class FakeReword:
+    def process(self, brd_input):
+        return "reworded"
+
+
+class FakeCompletion:
+    def __init__(self, result):
+        self.result = result
+
+    def process(self, brd_input, summary):
+        return self.result
+
+
+class FakeCreation:
+    def __init__(self, fail_speculation=False):
+        self.fail_speculation = fail_speculation
+        self.calls = []
+
+    def process(self, brd_input, summary, completion, cancel_event=None):
+        self.calls.append(completion)
+        speculative = cancel_event is not None
+        if speculative and self.fail_speculation:
+            raise RuntimeError("speculation failed")
+        return f"draft from {summary} ({'speculative' if speculative else completion['status']})"
+
+
+def run_pipeline(monkeypatch, completion, creation):
+    monkeypatch.setattr(v2_logic, "RewordSummaryAgent", FakeReword)
+    monkeypatch.setattr(v2_logic, "BRDCompletionAgent", lambda: FakeCompletion(completion))
+    monkeypatch.setattr(v2_logic, "get_creation_agent", lambda mode: creation)
+    return process_brd(BRDInput(prompt="p", template=b"", support_documents=[]))
+
+
+def test_need_path_writes_draft_from_reworded_summary(monkeypatch):
+    result = run_pipeline(monkeypatch, NEEDS_DETAILS, FakeCreation())
+
+    assert result["completion_suggestions"] == NEEDS_DETAILS
+    assert result["brd_draft"] == "draft from reworded (need)"
+
+
+def test_failed_speculation_falls_back_to_real_draft(monkeypatch):
+    creation = FakeCreation(fail_speculation=True)
+    result = run_pipeline(monkeypatch, dict(NO_COMPLETION_NEEDED), creation)
+
+    assert result["brd_draft"] == "draft from reworded (not_need)"
+    assert len(creation.calls) == 2
+
+
+def test_successful_speculation_is_reused(monkeypatch):
+    creation = FakeCreation()
+    result = run_pipeline(monkeypatch, dict(NO_COMPLETION_NEEDED), creation)
+
+    assert result["brd_draft"] == "draft from reworded (speculative)"
+    assert len(creation.calls) == 1
@@ -0,0 +1,42 @@
+from app import models
+from app.services.project_summary import append_document_summary, get_project_summary
+
+
+def add_document(db, project, name, summary):
+    doc = models.Document(filename=name, path=name, description="", project_id=project.id,
+                          summary_title=name, summary_description=summary)
+    db.add(doc)
+    db.flush()
+    return doc
+
+
+def test_first_append_without_aggregate_includes_existing_documents(db):
+    project = models.Project(name="p")
+    db.add(project)
+    db.flush()
+    add_document(db, project, "old.pdf", "older findings")
+    db.commit()
+
+    new_doc = add_document(db, project, "new.pdf", "new findings")
+    append_document_summary(db, new_doc)
+    db.commit()
+
+    combined, _ = get_project_summary(db, project.id)
+    assert "older findings" in combined
+    assert combined.count("new findings") == 1
+    assert db.get(models.ProjectSummary, project.id).document_count == 2
+
+
+def test_append_to_existing_aggregate_is_incremental(db):
+    project = models.Project(name="p")
+    db.add(project)
+    db.flush()
+    add_document(db, project, "a.pdf", "first")
+    get_project_summary(db, project.id)
+
+    append_document_summary(db, add_document(db, project, "b.pdf", "second"))
+    db.commit()
+
+    combined, version = get_project_summary(db, project.id)
+    assert combined == "Document: a.pdf\nfirst\n\nDocument: b.pdf\nsecond"
+    assert version == 2
@@ -0,0 +1,51 @@
+import pytest
+from app import models
+from app.services import vector_index
+from app.services.vector_index import index_document, project_retriever
+
+
+@pytest.fixture(autouse=True)
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "INDEX_DIR", str(tmp_path / "indexes"))
+
+
+def add_document(db, project_id, title, summary):
+    doc = models.Document(filename=title, project_id=project_id, summary_title=title, summary_description=summary)
+    db.add(doc)
+    db.commit()
+    return doc
+
+
+def test_documents_summarized_before_indexing_are_backfilled(db):
+    old = add_document(db, 1, "Budget", "(Chunk 1 of 1):\nThe project budget is capped at two million.")
+    new = add_document(db, 1, "Security", "(Chunk 1 of 1):\nAll data must be encrypted at rest.")
+    index_document(1, new.id, new.summary_title, new.summary_description)
+
+    retrieve = project_retriever(db, 1)
+
+    assert "two million" in retrieve("budget cap", 1)[0]
+    assert vector_index.ProjectIndex.load(1, vector_index.INDEX_DIR).indexed_document_ids() == {old.id, new.id}
+
+
+def test_deleted_documents_are_not_retrieved(db):
+    doc = add_document(db, 1, "Budget", "(Chunk 1 of 1):\nThe project budget is capped at two million.")
+    index_document(1, 999, "Gone", "(Chunk 1 of 1):\nThe project budget is unlimited.")
+
+    retrieve = project_retriever(db, 1)
+
+    assert retrieve("project budget", 5) == [f"{doc.summary_title}\nThe project budget is capped at two million."]
+
+
+def test_no_retriever_without_summarized_documents(db):
+    assert project_retriever(db, 1) is None
+
+
+def test_falls_back_when_backfill_fails(db, monkeypatch):
+    add_document(db, 1, "Budget", "(Chunk 1 of 1):\nThe project budget is capped.")
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(vector_index, "index_documents", fail)
+
+    assert project_retriever(db, 1) is None